@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+
+from src.benchmark.SyntheticData import LIBRARY_VERSION, build_library
+from src.utility.ParallelTestRunner import run_test_class
+from src.utility.Instrumentation import summarize
+from src.utility.TempStorage import DEFAULT_TEMP_STORAGE_DIR
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TESTS_DIR = os.path.join(project_root, 'src', 'tests')
+VALIDATORS = {
+    "AssetsData": ("AssetsData_test", "AssetsDataTestCases"),
+    "DailyInterestRateForFTD": ("DailyInterestRateForFTD_test", "DailyInterestRateForFTDTestCases"),
+    "FixedTermDeal": ("FixedTermDeal_test", "FixedTermDealTestCases"),
+    "SCVData": ("SCVData_test", "SCVDataTestCases"),
+}
+
+
+def library_for(rows, seed, library_dir, rebuild=False):
+    # Generated once per size and seed, then reused by later runs
+    root = os.path.join(library_dir, f"{rows}_rows_seed_{seed}_v{LIBRARY_VERSION}")
+    marker = os.path.join(root, ".complete")
+    if rebuild or not os.path.exists(marker):
+        shutil.rmtree(root, ignore_errors=True)
+        started = time.perf_counter()
+        build_library(root, rows, seed)
+        open(marker, "w").close()
+        logger.info(f"Generated the {rows:,} row library in {time.perf_counter() - started:.1f}s")
+    return root
+
+
+def run_validator(name, root, temp_storage_root):
+    # A fresh interpreter per run, so no workbook cache or imported module state carries over between runs
+    os.environ["SHAREPOINT_LOCAL_ROOT"] = root
+    module_name, class_name = VALIDATORS[name]
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(run_test_class, module_name, class_name, TESTS_DIR, temp_storage_root).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the validators in src/tests against generated data, "
+                                                 "served from a local mirror of the document library")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated row counts of every generated file, 1000 to 1000000")
+    parser.add_argument("--validators", default=",".join(VALIDATORS), help="comma separated, from: " +
+                        ", ".join(VALIDATORS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--library-dir", default=os.path.join(DEFAULT_TEMP_STORAGE_DIR, 'benchmark'))
+    parser.add_argument("--rebuild", action="store_true", help="generate the libraries again")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every listing and download, to time the download phase as over a network")
+    parser.add_argument("--output", default="./test_reports")
+    args = parser.parse_args()
+
+    # Downloads and sheets are parsed on every run unless these are set explicitly
+    os.environ.setdefault("DOWNLOAD_CACHE_BUDGET_MB", "0")
+    os.environ.setdefault("SHEET_SNAPSHOT_KEEP", "0")
+    os.environ["SHAREPOINT_LOCAL_LATENCY"] = str(args.latency)
+
+    temp_storage_root = os.path.join(args.library_dir, 'workers')
+    os.makedirs(temp_storage_root, exist_ok=True)
+    results = []
+    for rows in (int(size) for size in args.sizes.split(",")):
+        root = library_for(rows, args.seed, args.library_dir, args.rebuild)
+        for name in args.validators.split(","):
+            class_result = run_validator(name, root, temp_storage_root)
+            outcomes = [record["outcome"] for record in class_result["records"]]
+            results.append({"rows": rows, "validator": name, "seconds": class_result["time"],
+                            "tests": len(outcomes), "passed": outcomes.count("success"),
+                            "phases": summarize(class_result["timings"])})
+            logger.info(f"{name} on {rows:,} rows: {class_result['time']:.2f}s, "
+                        f"{outcomes.count('success')}/{len(outcomes)} tests passed")
+
+    print(f"\n{'Validator':<26}{'Rows':>10}{'Seconds':>10}  Slowest phase")
+    for result in results:
+        slowest = max(result["phases"], key=lambda line: line["seconds"], default=None)
+        slowest = f"{slowest['phase']} ({slowest['seconds']:.2f}s)" if slowest else ""
+        print(f"{result['validator']:<26}{result['rows']:>10,}{result['seconds']:>10.2f}  {slowest}")
+
+    os.makedirs(args.output, exist_ok=True)
+    json_path = os.path.join(args.output, f"Benchmark_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"seed": args.seed, "latency": args.latency, "results": results}, f, indent=2)
+    logger.info(f"Benchmark results written to {json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+import openpyxl
+
+# Document library folders and file names the test classes download from
+FLAGSTONE_FOLDER = "DEV/Saving/Inbound/Flagstone Savings Spreadsheets"
+SAVING_OUT_FOLDER = "DEV/Dev Data Out/Saving (Deposit)"
+ASSET_OUT_FOLDER = "DEV/Dev Data Out/Asset (Mortgage)"
+SCV_FOLDER = "DEV/SCV"
+FIXED_TERM_SAVING_FILE = "SAVING_DEV.CONF.FLAGSTONE_FIXED_TERM_SAVING.xlsx"
+DAILY_INTEREST_RATE_FILE = "SAVING_DEV.CONF.DAILY_INTEREST_RATE_FIXED_TERM.xlsx"
+LOAN_TAPE_FILE = "boe_mortgages_subentity_table_populated_v2 1.xlsx"
+
+# Bumped when the generated files change, so libraries generated before are not reused
+LIBRARY_VERSION = 3
+# Schedule length of each term as the output is built: 365 days a year and 30 days a month. Written out here rather
+# than taken from TermCalendar, so the benchmark checks the validator against the output's convention
+TERM_DAYS = {"01M": 30, "03M": 90, "06M": 180, "12M": 365, "24M": 730}
+TERMS = tuple(TERM_DAYS)
+DAY_BASIS = 365.0
+LOAN_TAPE_COLUMN = 132  # the tape's anchor column, AR fields are offsets from it
+LOAN_TAPE_WIDTH = LOAN_TAPE_COLUMN + 179  # the reporting date is the last column
+
+
+def _deals(rows, seed):
+    # (deal id, reference, term, rate, credit, start date) of each Flagstone deal
+    rng = random.Random(seed)
+    for deal in range(1, rows + 1):
+        term = rng.choice(TERMS)
+        yield (deal, f"FS{deal:07d}-{term}", term, round(rng.uniform(3, 6), 2), round(rng.uniform(1e3, 1e5), 2),
+               datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 300)))
+
+
+def write_flagstone_ftd(folder, rows, files=2, seed=1):
+    # 'FTD' sheets with two title rows and a header, data from row 4: reference (2), rate (7), credit (8), date (9)
+    workbooks = []
+    for number in range(files):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("FTD")
+        sheet.append(["Flagstone Fixed Term Deals"])
+        sheet.append([f"Part {number + 1} of {files}"])
+        sheet.append(["Deal Id", "Reference", "Term", "Product", "Currency", "Customer", "Interest Rate", "Credit",
+                      "Start Date"])
+        workbooks.append((workbook, sheet))
+    for deal, reference, term, rate, credit, start in _deals(rows, seed):
+        workbooks[deal % files][1].append([deal, reference, term, "Fixed Term Savings", "GBP", f"C{deal:07d}", rate,
+                                           credit, start])
+    for number, (workbook, _) in enumerate(workbooks):
+        workbook.save(os.path.join(folder, f"Flagstone FTD {number + 1}.xlsx"))
+
+
+def write_fixed_term_saving(path, rows, seed=1):
+    # The Flagstone deal columns between a leading row number and four trailing audit columns; terms are zero-padded
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Row", "Deal Id", "Reference", "Term", "Product", "Currency", "Customer", "Interest Rate", "Credit",
+                  "Start Date", "Created By", "Created On", "Batch", "Source"])
+    for deal, reference, term, rate, credit, start in _deals(rows, seed):
+        sheet.append([deal, deal, reference, term.zfill(4), "Fixed Term Savings", "GBP", f"C{deal:07d}", rate, credit,
+                      start, "ETL", datetime(2024, 12, 1), 1, "Flagstone"])
+    workbook.save(path)
+
+
+def write_daily_interest_schedule(path, rows, seed=1):
+    # One block of daily rows per deal, as many as the days in its term, until about rows rows are written
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Row", "Source", "Reference", "Date", "Day", "Opening Balance", "Credit", "Debit", "Closing Balance",
+                  "Interest Rate", "Daily Interest", "Daily Interest Cumulative", "Opening Balance Post Interest",
+                  "Closing Balance Post Interest", "Daily Interest Compounding", "Daily Interest Compounding Cumulative",
+                  "Opening Balance Post Interest Compounding", "Closing Balance Post Interest Compounding"])
+    written = 0
+    for deal, reference, term, rate, credit, start in _deals(rows, seed):
+        if written >= rows:
+            break
+        balance = cumulative = compounding_cumulative = 0.0
+        for day in range(TERM_DAYS[term]):
+            day_credit = credit if day == 0 else 0.0
+            opening = round(balance, 2)
+            balance += day_credit
+            closing = round(balance, 2)
+            daily = closing * (rate / 100) / DAY_BASIS
+            cumulative += daily
+            compounding = round(round(closing + cumulative, 2) * (rate / 100) / DAY_BASIS, 8)
+            compounding_cumulative += compounding
+            sheet.append([written, "Flagstone", reference, start + timedelta(days=day), day + 1, opening, day_credit,
+                          0.0, closing, rate, daily, cumulative, opening + cumulative - daily, closing + cumulative,
+                          compounding, compounding_cumulative, opening + compounding_cumulative - compounding,
+                          closing + compounding_cumulative])
+            written += 1
+    workbook.save(path)
+
+
+def write_loan_tape(path, rows, seed=1):
+    # AR-coded fields at their offsets from column 132, every other column left empty
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([f"Field {column}" for column in range(1, LOAN_TAPE_WIDTH + 1)])
+    for _ in range(rows):
+        row = [None] * LOAN_TAPE_WIDTH
+
+        def field(offset, value):
+            row[LOAN_TAPE_COLUMN + offset - 1] = value
+
+        field(-115, rng.choice(["COM", "SCI", "IND"]))
+        field(-84, rng.randint(300, 900))
+        field(-69, rng.randint(60, 360))
+        field(-65, rng.choice([1, 2]))
+        field(-63, rng.choice([0, rng.uniform(1e4, 5e5)]))
+        field(-61, rng.choice([1, 2, 7]))
+        field(-60, 1)
+        field(-59, rng.uniform(0, 1))
+        field(-57, rng.choice([None, rng.uniform(1, 5)]))
+        field(-46, rng.choice([1, 1, 2]))
+        field(-21, rng.uniform(0.01, 0.08))
+        field(-20, rng.choice([0, 0.01]))
+        field(0, rng.choice([1, 2, 3]))
+        field(1, rng.randint(1, 11))
+        field(5, rng.uniform(0.3, 1))
+        field(11, rng.uniform(0.3, 1))
+        field(26, rng.uniform(1, 2))
+        field(40, rng.choice([0, 0, 0.5, 1, 3]))
+        field(88, rng.choice([None, rng.randint(300, 900)]))
+        field(179, rng.choice(["April 2024", "May 2024"]))
+        sheet.append(row)
+    workbook.save(path)
+
+
+def _write_scv_file(path, header, rows):
+    # Pipe-delimited with a trailer line, as delivered
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("|".join(header) + "\n")
+        for row in rows:
+            f.write("|".join("" if value is None else str(value) for value in row) + "\n")
+            count += 1
+        f.write(f"TRAILER|{count}\n")
+
+
+def write_scv(folder, rows, seed=1, date="20240101"):
+    # The four SCV datasets sharing the SCVIDs 1..rows, each with the rows the field rules look for
+    rng = random.Random(seed)
+    flagstone_account, flagstone_customer = rows // 4 + 1, rows // 2 + 1
+
+    _write_scv_file(os.path.join(folder, f"SCV_{date}_Contactdetails.csv"),
+                    ["SCVID", "Address Line 1", "Address Line 2", "Post Code"],
+                    ((scvid, f"{scvid} High Street", "London", "EC1A 1BB") for scvid in range(1, rows + 1)))
+
+    _write_scv_file(os.path.join(folder, f"SCV_{date}_Customerdetails.csv"),
+                    ["SCVID", "Customer Surname Or Company Name", "Company Number"],
+                    ((scvid, "Flagstone Investment Management Limited" if scvid == flagstone_customer else "Smith",
+                      8528880.0 if scvid == flagstone_customer else float(rng.randint(1, 9999999)))
+                     for scvid in range(1, rows + 1)))
+
+    flagstone = ["Flagstone Group LTD Client Account", "SILFIM01YSHAHEEN", "Fixed Term Savings", 1, "B", "BEN", "Yes",
+                 "GBR", "Yes", "No", 100000.00, 0, "GBP", 100000.00, 1.0, 100000.00]
+    _write_scv_file(os.path.join(folder, f"SCV_{date}_Detailsofaccount.csv"),
+                    ["SCVID", "Account Title", "Account Number", "Product Name", "Account Holder Indicator",
+                     "Account Status Code", "Exclusion Type", "Recent Transactions", "Account Branch Jurisdiction",
+                     "BRRD Marking", "Structured Deposit Accounts", "Account Balance in Sterling",
+                     "Authorised Negative Balances", "Currency of Account", "Account Balance in Original Currency",
+                     "Exchange Rate", "Original Account Balance Before Interest"],
+                    ([scvid] + flagstone if scvid == flagstone_account else
+                     [scvid, "Saver", f"A{scvid:09d}", "Easy Access", 2, "A", "LEG", "No", "GBR", "No", "No",
+                      round(rng.uniform(0, 1e5), 2), 0, "GBP", round(rng.uniform(0, 1e5), 2), 1.0,
+                      round(rng.uniform(0, 1e5), 2)]
+                     for scvid in range(1, rows + 1)))
+
+    _write_scv_file(os.path.join(folder, f"SCV_{date}_Aggregatebalancedetails.csv"),
+                    ["SCVID", "Aggregate Balance", "Compensatable Amount"],
+                    ((scvid, 13802905.18 if scvid == 1 else round(rng.uniform(0, 1e5), 2),
+                      13802905.18 if scvid == 2 else round(rng.uniform(0, 85000), 2))
+                     for scvid in range(1, rows + 1)))
+
+
+def build_library(root, rows, seed=1):
+    # A local mirror of the document library with every file the test classes download, at rows rows each
+    folders = {name: os.path.join(root, name) for name in (FLAGSTONE_FOLDER, SAVING_OUT_FOLDER, ASSET_OUT_FOLDER,
+                                                           SCV_FOLDER)}
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
+    write_flagstone_ftd(folders[FLAGSTONE_FOLDER], rows, seed=seed)
+    write_fixed_term_saving(os.path.join(folders[SAVING_OUT_FOLDER], FIXED_TERM_SAVING_FILE), rows, seed=seed)
+    write_daily_interest_schedule(os.path.join(folders[SAVING_OUT_FOLDER], DAILY_INTEREST_RATE_FILE), rows, seed=seed)
+    write_loan_tape(os.path.join(folders[ASSET_OUT_FOLDER], LOAN_TAPE_FILE), rows, seed=seed)
+    write_scv(folders[SCV_FOLDER], rows, seed=seed)
@@ -3,8 +3,8 @@ import os
 import glob
 import unittest
 import logging
-import openpyxl
-from datetime import datetime, timedelta
+import numpy as np
+from itertools import islice
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
@@ -15,58 +15,82 @@ from dotenv import load_dotenv
 dotenv_path = os.path.join(project_root, '.env')
 load_dotenv(dotenv_path)
 
-from src.utility.DownloadTheData import DownloadData
+from src.utility.AsyncDownloadTheData import AsyncDownloadData
+from src.utility.TempStorage import temp_storage_path
+from src.utility.WorkbookCache import workbook_cache
+from src.utility.InterestSchedule import InterestSchedule
+from src.utility.TermCalendar import FTD_TERM_DAY_COUNT, INTEREST_DAY_BASIS, term_months, term_days
+from src.utility.Instrumentation import instrumented, sheet_rows
+from src.utility.Profiling import profiled
+from src.utility.ReconciliationState import INCREMENTAL_RECONCILIATION, ReconciliationState, fingerprint
+from src.utility.ErrorCollector import ErrorCollector
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+def block_rows(result, cls, block, *args, **kwargs):
+    return block.rows.size
+
+
+def deal_rows(result, cls, expected_sheet, block, *args, **kwargs):
+    return block.rows.size
+
+
+@profiled
 class DailyInterestRateForFTDTestCases(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
         logger.info("Data is Downloading....")
 
-        expected_data_path = os.path.join(current_dir, '..', 'tempStorage', 'expectedData')
-        actual_data_path = os.path.join(current_dir, '..', 'tempStorage', 'actualData')
+        cls.expected_data_dir = temp_storage_path('expectedData')
+        cls.actual_data_dir = temp_storage_path('actualData')
 
-        cls.expected_data_dir = os.path.normpath(expected_data_path)
-        cls.actual_data_dir = os.path.normpath(actual_data_path)
-
-        # To store all the error log
-        cls.error_msgs = []
+        # To store all the error log, bounded per check; date mismatches are only logged
+        cls.errors = ErrorCollector()
+        cls.logged_errors = ErrorCollector(fail_fast_after=0)
         cls.total_rows = 0
         cls.matched_rows = False
-
-        downloader = DownloadData()
-        downloader.get_files("DEV/Saving/Inbound/Flagstone Savings Spreadsheets", cls.expected_data_dir)
-        downloader.get_file("SAVING_DEV.CONF.DAILY_INTEREST_RATE_FIXED_TERM.xlsx", "DEV/Dev Data Out/Saving (Deposit)", cls.actual_data_dir)
+        # In incremental mode, the [check, count, messages] of each deal in the block being validated
+        # The settings the results and their messages depend on; a change to any of them validates every deal again
+        config = {"FTD_TERM_DAY_COUNT": FTD_TERM_DAY_COUNT, "INTEREST_DAY_BASIS": INTEREST_DAY_BASIS,
+                  "ERROR_SAMPLES_PER_CHECK": cls.errors.samples}
+        cls.reconciliation_state = ReconciliationState(cls.__name__, config) if INCREMENTAL_RECONCILIATION else None
+        cls.deal_messages = None
+
+        # The Flagstone folder is listed while the output file downloads
+        downloader = AsyncDownloadData()
+        downloader.run(downloader.get_files("DEV/Saving/Inbound/Flagstone Savings Spreadsheets", cls.expected_data_dir),
+                       downloader.get_file("SAVING_DEV.CONF.DAILY_INTEREST_RATE_FIXED_TERM.xlsx", "DEV/Dev Data Out/Saving (Deposit)", cls.actual_data_dir))
 
         logger.info("Data Downloaded")
 
     @staticmethod
+    @instrumented(rows=sheet_rows)
     def load_expected_excel(expectedExcel_file_path):
         try:
             logger.info(f"Loading expected Excel file:\n{expectedExcel_file_path}")
-            expected_workbook = openpyxl.load_workbook(expectedExcel_file_path, data_only=True)
-            if 'FTD' in expected_workbook.sheetnames:
-                sheet = expected_workbook['FTD']
-                return sheet
-            else:
-                logger.error(f"Workbook '{expectedExcel_file_path}' does not contain an 'FTD' sheet.")
-                return None
+            # Only the reference number (2), interest rate (7), credit (8) and date (9) columns are read
+            sheet = workbook_cache.load_sheet(expectedExcel_file_path, sheet_name='FTD', min_row=4, columns=(2, 7, 8, 9))
+            return sheet
+
+        except KeyError:
+            logger.error(f"Workbook '{expectedExcel_file_path}' does not contain an 'FTD' sheet.")
+            return None
 
         except Exception as e:
             logger.error(f"Error loading {expectedExcel_file_path}: {e}")
             return None
 
     @staticmethod
+    @instrumented(rows=sheet_rows)
     def load_actual_excel(actualExcel_file_path):
         try:
             logger.info(f"Loading actual Excel file:\n{actualExcel_file_path}")
-            actual_workbook = openpyxl.load_workbook(actualExcel_file_path, data_only=True)
-            sheet = actual_workbook.active
+            # Reference number (3) and the daily schedule columns (4 to 18)
+            sheet = workbook_cache.load_sheet(actualExcel_file_path, min_row=2, columns=range(3, 19))
             return sheet
 
         except Exception as e:
@@ -79,208 +103,237 @@ class DailyInterestRateForFTDTestCases(unittest.TestCase):
         return cell_value
 
     @classmethod
-    def check_the_date(cls, expected_sheet, exp_row, exp_col, actual_sheet, actual_row, actual_col, no_of_days):
-        expected_date = expected_sheet.cell(row=exp_row, column=exp_col).value
-
-        for row in range(actual_row, actual_row + no_of_days):  # for 12M There are 365 days and for 01M there are 30 days
-            actual_date = actual_sheet.cell(row=row, column=actual_col).value
-            if expected_date == actual_date:
-                expected_date += timedelta(days=1)
-                cls.matched_rows = True
-            else:
-                logger.error(f"Date didn't matched {row}: expected {expected_date}, got {actual_date}")
+    def build_reference_index(cls, actualExcel_file_path, actual_sheet):
+        # Maps each reference number in column 3 to its first row and term in months, built once per actual file
+        def _build(path):
+            reference_index = {}
+            for actual_row, (reference_number,) in enumerate(
+                    actual_sheet.iter_rows(min_row=2, min_col=3, max_col=3, values_only=True), start=2):
+                if not isinstance(reference_number, str) or reference_number in reference_index:
+                    continue
+                reference_index[reference_number] = (actual_row, term_months(reference_number))
+            return reference_index
+
+        return workbook_cache.get(actualExcel_file_path, _build,
+                                  lambda reference_index: len(reference_index) * 200, variant="reference_index")
 
     @classmethod
-    def check_the_day_sequence(cls, actual_sheet, actual_row, actual_col, no_of_days):
-        for day_sequence in range(1, no_of_days):
-            cls.total_rows += 1
-            actual_day = actual_sheet.cell(row=actual_row, column=actual_col).value
-            if actual_day == day_sequence:
-                actual_row += 1
-                cls.matched_rows = True
-            else:
-                logger.error(f"Day sequence didn't matched")
-                cls.error_msgs.append(f"Day sequence didn't matched")
+    @instrumented()
+    def load_interest_schedule(cls, actualExcel_file_path, actual_sheet):
+        # The schedule columns of the whole actual sheet, read once into arrays
+        return workbook_cache.get(actualExcel_file_path, lambda path: InterestSchedule.from_sheet(actual_sheet),
+                                  InterestSchedule.memory_usage, variant="interest_schedule")
 
-    @classmethod
-    def check_the_credit(cls, expected_sheet, exp_row, exp_col, actual_sheet, actual_row,actual_col):
-        expected_credit = expected_sheet.cell(row=exp_row, column=exp_col).value
-        actual_credit = actual_sheet.cell(row=actual_row, column=actual_col).value
-        if expected_credit != actual_credit:
-            logger.error(f"Credit amount didn't matched {actual_row}: expected {expected_credit}, got {actual_credit}")
-            cls.error_msgs.append(f"Opening Balance pre interest didn't matched {actual_row}: expected {expected_credit}, got {actual_credit}")
-            cls.matched_rows -= 1
-        else:
-           cls.matched_rows = True
+    @staticmethod
+    def _scalar(value):
+        return value.item() if isinstance(value, np.generic) else value
 
     @classmethod
-    def check_the_opening_balance_pre_interest(cls, expected_sheet,  exp_row, exp_col, actual_sheet, actual_row, actual_col, no_of_days):
-        expected_opening_balance = 0
-
-        for row in range(actual_row, actual_row + no_of_days-1):  # First row of opening balance is 0, so started from 2nd row
-            credit = float(actual_sheet.cell(row=row, column=actual_col + 1).value)
-            debit = float(actual_sheet.cell(row=row, column=actual_col + 2).value)
-            opening_balance = credit - debit
-            expected_opening_balance = expected_opening_balance + opening_balance
-            actual_opening_balance = actual_sheet.cell(row=row+1, column=actual_col).value
-            if round(expected_opening_balance,2) != actual_opening_balance:
-                logger.error(f"Opening Balance pre interest didn't matched {row}: expected {expected_opening_balance}, got {actual_opening_balance}")
-                cls.error_msgs.append(f"Opening Balance pre interest didn't matched {row}: expected {expected_opening_balance}, got {actual_opening_balance}")
-            else:
-               cls.matched_rows = True
+    def report_mismatches(cls, check, message, mismatched, rows, expected, actual, log_only=False):
+        deals, days = np.nonzero(mismatched)
+
+        # Formatted lazily, as only the sampled mismatches of a check are ever read
+        def messages(deals, days):
+            for deal, day in zip(deals, days):
+                yield message.format(row=rows[deal, day], expected=cls._scalar(expected[deal, day]),
+                                     actual=cls._scalar(actual[deal, day]))
+
+        (cls.logged_errors if log_only else cls.errors).add_many(check, len(deals), messages(deals, days))
+        if not log_only and cls.deal_messages is not None and len(deals):
+            # Each deal's count and its share of the check's sampled messages, carried forward by later runs
+            counts = np.bincount(deals)
+            samples = {}
+            for deal, error_msg in zip(deals, islice(messages(deals, days), cls.errors.samples)):
+                samples.setdefault(deal, []).append(error_msg)
+            for deal in np.unique(deals):
+                cls.deal_messages[deal].append([check, int(counts[deal]), samples.get(deal, [])])
+        if not mismatched.all():
+            cls.matched_rows = True
 
     @classmethod
-    def check_the_closing_balance_pre_interest(cls, expected_sheet,  exp_row, exp_col, actual_sheet, actual_row, actual_col, no_of_days):
-        expected_closing_balance = 0
-
-        for row in range(actual_row, actual_row + no_of_days):
-            actual_closing_balance = actual_sheet.cell(row=row, column=actual_col).value
-            credit = float(actual_sheet.cell(row=row, column=actual_col - 2).value)
-            debit = float(actual_sheet.cell(row=row, column=actual_col - 1).value)
-            closing_balance = credit - debit
-            expected_closing_balance = expected_closing_balance + closing_balance
-            if round(expected_closing_balance,2) != actual_closing_balance:
-                logger.error(f"Closing Balance pre interest didn't matched at row {row}: expected {expected_closing_balance}, got {actual_closing_balance}")
-                cls.error_msgs.append(f"Closing Balance pre interest didn't matched at row {row}: expected {expected_closing_balance}, got {actual_closing_balance}")
-            else:
-               cls.matched_rows = True
+    @instrumented(rows=block_rows)
+    def check_the_date(cls, block, expected_dates, actual_col):
+        # One row per day of the term, one day apart from the expected start date
+        start_dates = np.array(expected_dates, dtype="datetime64[us]")[:, None]
+        expected = start_dates + np.arange(block.no_of_days) * np.timedelta64(1, "D")
+        actual = block.dates()
+        cls.report_mismatches("Date", "Date didn't matched {row}: expected {expected}, got {actual}", expected != actual,
+                              block.rows, expected, block.raw(actual_col), log_only=True)
 
     @classmethod
-    def check_the_interest_rate(cls, expected_sheet, exp_row, exp_col, actual_sheet, actual_row, actual_col, no_of_days):
-        expected_interest_rate = round(expected_sheet.cell(row=exp_row, column=exp_col).value,2)
-
-        for row in range(actual_row, actual_row + no_of_days):  # for 12M There are  365 days
-            actual_interest = actual_sheet.cell(row=row, column=actual_col).value
-            if expected_interest_rate != actual_interest:
-                logger.error(f"Interest rate didn't match at row {row}: expected {expected_interest_rate}, got {actual_interest}")
-                cls.error_msgs.append(f"Interest rate didn't match at row {row}: expected {expected_interest_rate}, got {actual_interest}")
-            else:
-               cls.matched_rows = True
+    @instrumented(rows=block_rows)
+    def check_the_day_sequence(cls, block, actual_col):
+        no_of_days = block.no_of_days
+        cls.total_rows += len(block) * (no_of_days - 1)
+        expected = np.broadcast_to(np.arange(1, no_of_days), (len(block), no_of_days - 1))
+        mismatched = block.values(actual_col)[:, :no_of_days - 1] != expected
+        cls.report_mismatches("Day sequence", "Day sequence didn't matched", mismatched, block.rows, expected,
+                              block.raw(actual_col))
 
     @classmethod
-    def calculate_and_check_the_daily_interest_amount(cls, actual_sheet, actual_row, actual_col, no_of_days):
-        interest_rate = float(actual_sheet.cell(row=actual_row, column=actual_col-1).value)
-
-        for row in range(actual_row, actual_row + no_of_days):  # for 12M there are 365 days
-            closing_balance = float(actual_sheet.cell(row=row, column=actual_col - 2).value)
-            daily_interest_rate = (closing_balance * (interest_rate / 100) / 365)  # Calculation for daily interest rate for 12M (365 days)#
-
-            actual_interest_rate = float(actual_sheet.cell(row=row, column=actual_col).value)
-            if abs(actual_interest_rate - daily_interest_rate) > 1e-5:
-                logger.error(f"Daily interest rate didn't match at row {row}: expected {daily_interest_rate}, got {actual_interest_rate}")
-                cls.error_msgs.append(f"Daily interest amount didn't match at row {row}: expected {daily_interest_rate}, got {actual_interest_rate}")
+    @instrumented(rows=block_rows)
+    def check_the_credit(cls, block, expected_credits, twelve_month, actual_col):
+        # The credit is only checked for 12M deals
+        actual_credits = block.raw(actual_col)[:, 0]
+        for deal, (actual_row, expected_credit, actual_credit, checked) in enumerate(
+                zip(block.rows[:, 0], expected_credits, actual_credits, twelve_month)):
+            if not checked:
+                continue
+            if expected_credit != actual_credit:
+                error_msg = f"Opening Balance pre interest didn't matched {actual_row}: expected {expected_credit}, got {actual_credit}"
+                cls.errors.add("Credit", error_msg)
+                if cls.deal_messages is not None:
+                    cls.deal_messages[deal].append(["Credit", 1, [error_msg]])
+                cls.matched_rows -= 1
             else:
                 cls.matched_rows = True
 
     @classmethod
-    def calculate_and_check_the_daily_interest_amount_cumulative(cls, actual_sheet, actual_row, actual_col, no_of_days):
-        daily_interest_amount_cumulative = 0
-
-        for row in range(actual_row, actual_row + no_of_days):  # for 12M there are 365 days
-            daily_interest_amount = float(actual_sheet.cell(row=row, column=actual_col - 1).value)
-            actual_interest_amount_cumulative = float(actual_sheet.cell(row=row, column=actual_col).value)
-            daily_interest_amount_cumulative += daily_interest_amount
-            if abs(actual_interest_amount_cumulative - daily_interest_amount_cumulative) > 1e-5:
-                logger.error(f"Interest amount cumulative didn't match at row {row}: expected {daily_interest_amount_cumulative}, got {actual_interest_amount_cumulative}")
-                cls.error_msgs.append(f"Interest amount cumulative didn't match at row {row}: expected {daily_interest_amount_cumulative}, got {actual_interest_amount_cumulative}")
-            else:
-                cls.matched_rows = True
+    @instrumented(rows=block_rows)
+    def check_the_opening_balance_pre_interest(cls, block, actual_col):
+        # First row of opening balance is 0, so each day's movement is compared with the next day's opening balance
+        no_of_days = block.no_of_days
+        movements = block.values(actual_col + 1) - block.values(actual_col + 2)  # credit - debit
+        expected = np.cumsum(movements, axis=1)[:, :no_of_days - 1]
+        mismatched = np.round(expected, 2) != block.values(actual_col)[:, 1:]
+        cls.report_mismatches("Opening Balance pre interest", "Opening Balance pre interest didn't matched {row}: expected {expected}, got {actual}",
+                              mismatched, block.rows, expected, block.raw(actual_col)[:, 1:])
 
     @classmethod
-    def calculate_and_check_the_opening_balance_post_interest(cls, actual_sheet, actual_row, actual_col, no_of_days):
-
-        for row in range(actual_row+1, actual_row + no_of_days-1):
-            opening_balance_pre_interest = float(actual_sheet.cell(row=row,column=actual_col - 7).value)  # Getting the value of Opening Balance pre Interest
-            daily_interest_amount_cumulative = float(actual_sheet.cell(row=row-1, column=actual_col - 1).value) #Getting the daily interest amount cumulative
-
-            actual_opening_balance_post_interest = float(actual_sheet.cell(row=row, column=actual_col).value)
-            expected_opening_balance_post_interest = opening_balance_pre_interest + daily_interest_amount_cumulative
-
-            if abs(actual_opening_balance_post_interest - round(expected_opening_balance_post_interest,3)) > 1e-1:
-                logger.error(f"Opening Balance Post Interest didn't match at row {row}: expected {expected_opening_balance_post_interest}, got {actual_opening_balance_post_interest}")
-                cls.error_msgs.append(f"Opening Balance Post Interest didn't match at row {row}: expected {expected_opening_balance_post_interest}, got {actual_opening_balance_post_interest}")
-            else:
-                cls.matched_rows = True
+    @instrumented(rows=block_rows)
+    def check_the_closing_balance_pre_interest(cls, block, actual_col):
+        movements = block.values(actual_col - 2) - block.values(actual_col - 1)  # credit - debit
+        expected = np.cumsum(movements, axis=1)
+        mismatched = np.round(expected, 2) != block.values(actual_col)
+        cls.report_mismatches("Closing Balance pre interest", "Closing Balance pre interest didn't matched at row {row}: expected {expected}, got {actual}",
+                              mismatched, block.rows, expected, block.raw(actual_col))
 
     @classmethod
-    def calculate_and_check_the_closing_balance_post_interest(cls, actual_sheet, actual_row, actual_col, no_of_days):
-
-        for row in range(actual_row, actual_row + no_of_days):
-            closing_balance_pre_interest = float(actual_sheet.cell(row=row, column=actual_col - 5).value)  # Getting the value of Closing Balance pre Interest
-            daily_interest_amount_cumulative = float(actual_sheet.cell(row=row,column=actual_col - 2).value)  # Getting the daily interest amount cumulative
-
-            actual_closing_balance_post_interest = float(actual_sheet.cell(row=row, column=actual_col).value)
-            expected_closing_balance_post_interest = closing_balance_pre_interest + daily_interest_amount_cumulative
-
-            if abs(actual_closing_balance_post_interest - round(expected_closing_balance_post_interest,3)) > 1e-1:
-                logger.error(f"Closing Balance Post Interest didn't match at row {row}: expected {expected_closing_balance_post_interest}, got {actual_closing_balance_post_interest}")
-                cls.error_msgs.append(f"Closing Balance Post Interest didn't match at row {row}: expected {expected_closing_balance_post_interest}, got {actual_closing_balance_post_interest}")
-            else:
-                cls.matched_rows = True
+    @instrumented(rows=block_rows)
+    def check_the_interest_rate(cls, block, expected_rates, actual_col):
+        expected = np.broadcast_to(np.array([[round(rate, 2)] for rate in expected_rates]), block.rows.shape)
+        mismatched = expected != block.values(actual_col)
+        cls.report_mismatches("Interest rate", "Interest rate didn't match at row {row}: expected {expected}, got {actual}",
+                              mismatched, block.rows, expected, block.raw(actual_col))
 
     @classmethod
-    def calculate_and_check_the_daily_interest_amount_compounding(cls, actual_sheet, actual_row, actual_col, no_of_days):
-
-        interest_rate = float(actual_sheet.cell(row=actual_row, column=actual_col-5).value)  # Getting the interest_rate
-
-        for row in range(actual_row+1, actual_row + no_of_days-1):
-            closing_balance_post_interest = round(float(actual_sheet.cell(row=row, column=actual_col - 1).value),2)  # Getting the value of Closing Balance pre Interest
-            expected_compound_interest_amount = round((closing_balance_post_interest * (interest_rate / 100))/365 , 8)
-
-            actual_compound_interest_amount = float(actual_sheet.cell(row=row, column=actual_col).value)
-
-            if abs(actual_compound_interest_amount - expected_compound_interest_amount) > 1e-0:
-                logger.error(f"Interest amount Compounding didn't match at row {row}: expected {expected_compound_interest_amount}, got {actual_compound_interest_amount}")
-                cls.error_msgs.append(f"Interest amount Compounding didn't match at row {row}: expected {expected_compound_interest_amount}, got {actual_compound_interest_amount}")
-            else:
-                cls.matched_rows = True
+    def check_within_tolerance(cls, check, message, rows, expected, actual, tolerance):
+        # A missing value is never within tolerance
+        mismatched = ~(np.abs(actual - expected) <= tolerance)
+        cls.report_mismatches(check, message, mismatched, rows, expected, actual)
 
     @classmethod
-    def calculate_and_check_the_daily_interest_amount_compounding_cumulative(cls, actual_sheet, actual_row, actual_col, no_of_days):
-
-        daily_interest_amount_cumulative = 0
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_daily_interest_amount(cls, block, actual_col):
+        interest_rate = block.values(actual_col - 1)[:, :1]
+        closing_balance = block.values(actual_col - 2)
+        expected = closing_balance * (interest_rate / 100) / block.day_basis()  # Calculation for daily interest rate
+        cls.check_within_tolerance("Daily interest amount", "Daily interest amount didn't match at row {row}: expected {expected}, got {actual}",
+                                   block.rows, expected, block.values(actual_col), 1e-5)
 
-        for row in range(actual_row, actual_row + no_of_days):
-            daily_interest_amount = float(actual_sheet.cell(row=row, column=actual_col - 1).value)
-            actual_interest_amount_cumulative = float(actual_sheet.cell(row=row, column=actual_col).value)
-            daily_interest_amount_cumulative += daily_interest_amount
-            if abs(actual_interest_amount_cumulative - daily_interest_amount_cumulative) > 1e-0:
-                logger.error(f"Interest amount Cumulative Compounding didn't match at row {row}: expected {daily_interest_amount_cumulative}, got {actual_interest_amount_cumulative}")
-                cls.error_msgs.append(f"Interest amount Cumulative Compounding didn't match at row {row}: expected {daily_interest_amount_cumulative}, got {actual_interest_amount_cumulative}")
-            else:
-               cls.matched_rows = True
+    @classmethod
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_daily_interest_amount_cumulative(cls, block, actual_col):
+        expected = np.cumsum(block.values(actual_col - 1), axis=1)
+        cls.check_within_tolerance("Interest amount cumulative", "Interest amount cumulative didn't match at row {row}: expected {expected}, got {actual}",
+                                   block.rows, expected, block.values(actual_col), 1e-5)
 
     @classmethod
-    def calculate_and_check_the_opening_balance_post_interest_compounding(cls, actual_sheet, actual_row, actual_col, no_of_days):
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_opening_balance_post_interest(cls, block, actual_col):
+        days = slice(1, block.no_of_days - 1)
+        opening_balance_pre_interest = block.values(actual_col - 7)[:, days]
+        daily_interest_amount_cumulative = block.values(actual_col - 1)[:, :block.no_of_days - 2]  # previous day
+        expected = opening_balance_pre_interest + daily_interest_amount_cumulative
+        mismatched = ~(np.abs(block.values(actual_col)[:, days] - np.round(expected, 3)) <= 1e-1)
+        cls.report_mismatches("Opening Balance Post Interest", "Opening Balance Post Interest didn't match at row {row}: expected {expected}, got {actual}",
+                              mismatched, block.rows[:, days], expected, block.values(actual_col)[:, days])
 
-        for row in range(actual_row + 1, actual_row + no_of_days):
-            opening_balance_pre_interest = float(actual_sheet.cell(row=row , column=actual_col - 11).value)  # Getting the value of Opening Balance pre Interest
-            daily_interest_amount_cumulative = float(actual_sheet.cell(row=row - 1, column=actual_col - 1).value)  # Getting the daily interest amount cumulative
+    @classmethod
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_closing_balance_post_interest(cls, block, actual_col):
+        expected = block.values(actual_col - 5) + block.values(actual_col - 2)
+        mismatched = ~(np.abs(block.values(actual_col) - np.round(expected, 3)) <= 1e-1)
+        cls.report_mismatches("Closing Balance Post Interest", "Closing Balance Post Interest didn't match at row {row}: expected {expected}, got {actual}",
+                              mismatched, block.rows, expected, block.values(actual_col))
 
-            actual_opening_balance_post_interest = float(actual_sheet.cell(row=row, column=actual_col).value)
-            expected_opening_balance_post_interest = opening_balance_pre_interest + daily_interest_amount_cumulative
+    @classmethod
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_daily_interest_amount_compounding(cls, block, actual_col):
+        days = slice(1, block.no_of_days - 1)
+        interest_rate = block.values(actual_col - 5)[:, :1]
+        closing_balance_post_interest = np.round(block.values(actual_col - 1)[:, days], 2)
+        expected = np.round((closing_balance_post_interest * (interest_rate / 100)) / block.day_basis()[:, days], 8)
+        cls.check_within_tolerance("Interest amount Compounding", "Interest amount Compounding didn't match at row {row}: expected {expected}, got {actual}",
+                                   block.rows[:, days], expected, block.values(actual_col)[:, days], 1e-0)
 
-            if abs(actual_opening_balance_post_interest - expected_opening_balance_post_interest) > 1e-0:
-                logger.error(f"Opening Balance Post Interest Compounding didn't match at row {row}: expected {expected_opening_balance_post_interest}, got {actual_opening_balance_post_interest}")
-                cls.error_msgs.append(f"Opening Balance Post Interest Compounding didn't match at row {row}: expected {expected_opening_balance_post_interest}, got {actual_opening_balance_post_interest}")
-            else:
-               cls.matched_rows = True
+    @classmethod
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_daily_interest_amount_compounding_cumulative(cls, block, actual_col):
+        expected = np.cumsum(block.values(actual_col - 1), axis=1)
+        cls.check_within_tolerance("Interest amount Cumulative Compounding", "Interest amount Cumulative Compounding didn't match at row {row}: expected {expected}, got {actual}",
+                                   block.rows, expected, block.values(actual_col), 1e-0)
 
     @classmethod
-    def calculate_and_check_the_closing_balance_post_interest_compounding(cls, actual_sheet, actual_row, actual_col, no_of_days):
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_opening_balance_post_interest_compounding(cls, block, actual_col):
+        opening_balance_pre_interest = block.values(actual_col - 11)[:, 1:]
+        daily_interest_amount_cumulative = block.values(actual_col - 1)[:, :-1]  # previous day
+        expected = opening_balance_pre_interest + daily_interest_amount_cumulative
+        cls.check_within_tolerance("Opening Balance Post Interest Compounding", "Opening Balance Post Interest Compounding didn't match at row {row}: expected {expected}, got {actual}",
+                                   block.rows[:, 1:], expected, block.values(actual_col)[:, 1:], 1e-0)
 
-        for row in range(actual_row, actual_row + no_of_days):
-            closing_balance_pre_interest = float(actual_sheet.cell(row=row, column=actual_col - 9).value)  # Getting the value of Closing Balance pre Interest
-            daily_interest_amount_cumulative = float(actual_sheet.cell(row=row, column=actual_col - 2).value)  # Getting the daily interest amount cumulative
+    @classmethod
+    @instrumented(rows=block_rows)
+    def calculate_and_check_the_closing_balance_post_interest_compounding(cls, block, actual_col):
+        expected = block.values(actual_col - 9) + block.values(actual_col - 2)
+        cls.check_within_tolerance("Closing Balance Post Interest Compounding", "Closing Balance Post Interest Compounding didn't match at row {row}: expected {expected}, got {actual}",
+                                   block.rows, expected, block.values(actual_col), 1e-0)
 
-            actual_closing_balance_post_interest = float(actual_sheet.cell(row=row, column=actual_col).value)
-            expected_closing_balance_post_interest = closing_balance_pre_interest + daily_interest_amount_cumulative
+    @classmethod
+    @instrumented(rows=deal_rows)
+    def validate_deals(cls, expected_sheet, block, exp_rows):
+        # Every check runs once over the stacked blocks of all deals with the same number of days
+        expected_dates = [expected_sheet.cell(row=exp_row, column=9).value for exp_row in exp_rows]
+        expected_credits = [expected_sheet.cell(row=exp_row, column=8).value for exp_row in exp_rows]
+        expected_rates = [expected_sheet.cell(row=exp_row, column=7).value for exp_row in exp_rows]
+        twelve_month = [term_months(expected_sheet.cell(row=exp_row, column=2).value) == 12 for exp_row in exp_rows]
+
+        cls.check_the_date(block, expected_dates, 4)  # in expected_sheet Date column is 9 and in actual_sheet 4
+        cls.check_the_day_sequence(block, 5)  # check the Day Sequence 1,2,...,364,365
+        cls.check_the_opening_balance_pre_interest(block, 6)  # check the opening balance pre interest
+        cls.check_the_credit(block, expected_credits, twelve_month, 7)
+        cls.check_the_closing_balance_pre_interest(block, 9)  # check the closing balance pre interest
+        cls.check_the_interest_rate(block, expected_rates, 10)  # check the interest rate
+        cls.calculate_and_check_the_daily_interest_amount(block, 11)  # calculate the daily interest amount
+        cls.calculate_and_check_the_daily_interest_amount_cumulative(block, 12)  # calculate the daily interest amount cumulative
+        cls.calculate_and_check_the_opening_balance_post_interest(block, 13)  # calculate the opening balance post interest
+        cls.calculate_and_check_the_closing_balance_post_interest(block, 14)  # calculate the closing balance post interest
+        cls.calculate_and_check_the_daily_interest_amount_compounding(block, 15)  # calculate the daily interest amount compounding
+        cls.calculate_and_check_the_daily_interest_amount_compounding_cumulative(block, 16)  # calculate the daily interest amount compound cumulative
+        cls.calculate_and_check_the_opening_balance_post_interest_compounding(block, 17)  # Calculate the opening balance post interest compounding
+        cls.calculate_and_check_the_closing_balance_post_interest_compounding(block, 18)  # Calculate the closing balance post interest compounding
 
-            if abs(actual_closing_balance_post_interest - expected_closing_balance_post_interest) > 1e-0:
-                logger.error(f"Closing Balance Post Interest Compounding didn't match at row {row}: expected {expected_closing_balance_post_interest}, got {actual_closing_balance_post_interest}")
-                cls.error_msgs.append(f"Closing Balance Post Interest Compounding didn't match at row {row}: expected {expected_closing_balance_post_interest}, got {actual_closing_balance_post_interest}")
-            else:
-               cls.matched_rows = True
+    @classmethod
+    def carry_forward_deals(cls, file_name, expected_sheet, schedule, deals, no_of_days):
+        # Deals whose expected row and output block are unchanged since the last run keep that run's messages; the
+        # others are returned with their state key and fingerprint to be validated
+        changed = []
+        block_fingerprints = schedule.block([actual_row for _, actual_row in deals], no_of_days).fingerprints()
+        for (exp_row, actual_row), block_fingerprint in zip(deals, block_fingerprints):
+            expected = [expected_sheet.cell(row=exp_row, column=col).value for col in (2, 7, 8, 9)]
+            key = f"{file_name}|{expected[0]}"
+            deal_fingerprint = fingerprint(expected, block_fingerprint)
+            messages = cls.reconciliation_state.carried(key, deal_fingerprint)
+            if messages is None:
+                changed.append((exp_row, actual_row, key, deal_fingerprint))
+                continue
+            cls.reconciliation_state.record(key, deal_fingerprint, messages)
+            for check, count, samples in messages:
+                cls.errors.add_many(check, count, iter(samples))
+            cls.total_rows += no_of_days - 1
+        logger.info(f"{len(deals) - len(changed)} of {len(deals)} deals unchanged since the last run")
+        return changed
 
     def test_to_validate_calculation_of_Daily_Interest_Rate_FTD(self):
         global match_rows_count
@@ -294,64 +347,55 @@ class DailyInterestRateForFTDTestCases(unittest.TestCase):
 
             actualExcel_file_path = os.path.join(self.actual_data_dir, "SAVING_DEV.CONF.DAILY_INTEREST_RATE_FIXED_TERM.xlsx")
             actual_sheet = self.load_actual_excel(actualExcel_file_path)
+            reference_index = self.build_reference_index(actualExcel_file_path, actual_sheet)
+            schedule = self.load_interest_schedule(actualExcel_file_path, actual_sheet)
 
-            covered_reference_number = []
+            covered_reference_number = set()
+            deals_by_days = {}  # (exp_row, actual_row) of each deal to validate, by the number of days in its term
 
             if expected_sheet is not None:
                 for exp_row in range(4, expected_sheet.max_row + 1):
                     expected_row_value = self.get_row_values(expected_sheet, exp_row, 2)
-                    for actual_row in range(2, actual_sheet.max_row + 1):
-                        actual_row_value = self.get_row_values(actual_sheet, actual_row, 3)
-
-                        # for 12M there are 365 days and for 01M there are 30 days
-                        if expected_row_value == actual_row_value and "12M" in actual_row_value and expected_row_value not in covered_reference_number:
-                            self.check_the_date(expected_sheet, exp_row, 9, actual_sheet, actual_row, 4,365)  # in expected_sheet Date column is 9 and in actual_sheet 4
-                            self.check_the_day_sequence(actual_sheet, actual_row, 5,365)  # check the Day Sequence 1,2,...,364,365
-                            self.check_the_opening_balance_pre_interest(expected_sheet, exp_row, 8, actual_sheet,actual_row, 6,365)  # check the opening balance pre interest
-                            self.check_the_credit(expected_sheet, exp_row, 8, actual_sheet, actual_row, 7)
-                            self.check_the_closing_balance_pre_interest(expected_sheet, exp_row, 8, actual_sheet,actual_row, 9,365)  # check the closing balance pre interest
-                            self.check_the_interest_rate(expected_sheet, exp_row, 7, actual_sheet, actual_row, 10,365)  # check the interest rate
-                            self.calculate_and_check_the_daily_interest_amount(actual_sheet, actual_row, 11,365)  # calculate the daily interest amount
-                            self.calculate_and_check_the_daily_interest_amount_cumulative(actual_sheet, actual_row,12,365)  # calculate the daily interest amount cumulative
-                            self.calculate_and_check_the_opening_balance_post_interest(actual_sheet, actual_row, 13,365)  # calculate the opening balance pre interest
-                            self.calculate_and_check_the_closing_balance_post_interest(actual_sheet, actual_row, 14,365)  # calculate the closing balance pre interest
-                            self.calculate_and_check_the_daily_interest_amount_compounding(actual_sheet, actual_row,15,365)  # calculate the daily interest amount compounding
-                            self.calculate_and_check_the_daily_interest_amount_compounding_cumulative(actual_sheet,actual_row,16,365)  # calculate the daily interest amount compound cumulative
-                            self.calculate_and_check_the_opening_balance_post_interest_compounding(actual_sheet,actual_row, 17,365)  # Calculate the opening balance post interest compounding
-                            self.calculate_and_check_the_closing_balance_post_interest_compounding(actual_sheet,actual_row, 18,365)  # Calculate the closing balance post interest compounding
-                            if self.matched_rows:
-                                match_rows_count += 1
-                            covered_reference_number.append(expected_row_value)
-                            break
-                        elif expected_row_value == actual_row_value and "01M" in actual_row_value and expected_row_value not in covered_reference_number:
-                            self.check_the_date(expected_sheet, exp_row, 9, actual_sheet, actual_row, 4,30)  # check for next 30 days, in expected_sheet Date column is 9 and in actual_sheet 4
-                            self.check_the_day_sequence(actual_sheet, actual_row, 5,30)  # check the Day Sequence 1,2,...28,29,30
-                            self.check_the_opening_balance_pre_interest(expected_sheet, exp_row, 8, actual_sheet,actual_row, 6,30)  # check the opening balance pre interest
-                            self.check_the_closing_balance_pre_interest(expected_sheet, exp_row, 8, actual_sheet,actual_row, 9,30)  # check the closing balance pre interest
-                            self.check_the_interest_rate(expected_sheet, exp_row, 7, actual_sheet, actual_row, 10,30)  # check the interest rate
-                            self.calculate_and_check_the_daily_interest_amount(actual_sheet, actual_row, 11,30)  # calculate the daily interest amount
-                            self.calculate_and_check_the_daily_interest_amount_cumulative(actual_sheet, actual_row,12,30)  # calculate the daily interest amount cumulative
-                            self.calculate_and_check_the_opening_balance_post_interest(actual_sheet, actual_row, 13,30)  # calculate the opening balance pre interest
-                            self.calculate_and_check_the_closing_balance_post_interest(actual_sheet, actual_row, 14,30)  # calculate the closing balance pre interest
-                            self.calculate_and_check_the_daily_interest_amount_compounding(actual_sheet, actual_row,15,30)  # calculate the daily interest amount compounding
-                            self.calculate_and_check_the_daily_interest_amount_compounding_cumulative(actual_sheet,actual_row,16,30)  # calculate the daily interest amount compound cumulative
-                            self.calculate_and_check_the_opening_balance_post_interest_compounding(actual_sheet,actual_row, 17,30)  # Calculate the opening balance post interest compounding
-                            self.calculate_and_check_the_closing_balance_post_interest_compounding(actual_sheet,actual_row, 18,30)  # Calculate the closing balance post interest compounding
-                            if self.matched_rows:
-                                match_rows_count += 1
-                            covered_reference_number.append(expected_row_value)
-                            break
+                    if expected_row_value not in reference_index or expected_row_value in covered_reference_number:
+                        continue
+                    actual_row, months = reference_index[expected_row_value]
+
+                    if months:
+                        # The day count follows from the term and the start date, e.g. 366 days for 12M over a leap day
+                        no_of_days = term_days(self.get_row_values(expected_sheet, exp_row, 9), months)
+                        deals_by_days.setdefault(no_of_days, []).append((exp_row, actual_row))
+                        covered_reference_number.add(expected_row_value)
+
+                # Deals of every product with the same number of days are validated together
+                for no_of_days, deals in sorted(deals_by_days.items(), reverse=True):
+                    if self.reconciliation_state is not None and deals:
+                        changed = self.carry_forward_deals(file_name, expected_sheet, schedule, deals, no_of_days)
+                        deals = [(exp_row, actual_row) for exp_row, actual_row, _, _ in changed]
+                        type(self).deal_messages = [[] for _ in deals]
+                    if not deals:
+                        continue
+                    block = schedule.block([actual_row for _, actual_row in deals], no_of_days)
+                    self.validate_deals(expected_sheet, block, [exp_row for exp_row, _ in deals])
+                    if self.matched_rows:
+                        match_rows_count += len(deals)
+                    if self.reconciliation_state is not None:
+                        for (_, _, key, deal_fingerprint), messages in zip(changed, self.deal_messages):
+                            self.reconciliation_state.record(key, deal_fingerprint, messages)
+                        type(self).deal_messages = None
 
             else:
                 logger.error(f"Error loading expected sheet: {expectedExcel_file_path}")
 
+        if self.reconciliation_state is not None:
+            self.reconciliation_state.save()
+
         # self.error_msgs.append(f"Total rows: {self.total_rows}")
         # self.error_msgs.append(f"Matched rows: {match_rows_count}")
         # self.error_msgs.append(f"Unmatched rows: {self.total_rows-match_rows_count}")
 
-        if self.error_msgs:
-            # Join all error messages into a single message
-            error_msg = "<br/>".join(self.error_msgs)
+        if self.errors:
+            # The sampled error messages and the number left out of each check
+            error_msg = self.errors.summary()
             # Fail the test with the error message
             self.fail(error_msg)
         else:
@@ -0,0 +1,146 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+
+from dotenv import load_dotenv
+dotenv_path = os.path.join(project_root, '.env')
+load_dotenv(dotenv_path)
+
+from src.utility.AsyncDownloadTheData import AsyncDownloadData
+from src.utility.DownloadCache import DownloadCache
+from src.utility.DownloadTheData import DownloadData
+from src.utility.LocalSharepointConnection import LocalSharepointConnection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds every request to the local mirror takes
+LATENCY = 0.2
+EXPECTED_FOLDER = "Expected"
+EXPECTED_FILES = ("flagstone_1.xlsx", "flagstone_2.xlsx", "flagstone_3.xlsx", "flagstone_4.xlsx")
+ACTUAL_FOLDER = "Actual"
+ACTUAL_FILE = "output.xlsx"
+
+
+class TimedConnection(LocalSharepointConnection):
+    # Records when each listing and download request started and finished
+    def __init__(self, root_dir, latency=LATENCY):
+        super().__init__(root_dir, latency=latency)
+        self.requests = []  # (kind, folder name, start, end)
+        self._requests_lock = threading.Lock()
+
+    def _timed(self, kind, folder_name, request, *args):
+        start = time.perf_counter()
+        result = request(*args)
+        with self._requests_lock:
+            self.requests.append((kind, folder_name, start, time.perf_counter()))
+        return result
+
+    def get_files_list(self, folder_name):
+        return self._timed("listing", folder_name, super().get_files_list, folder_name)
+
+    def open_file_stream(self, file_name, folder_name, chunk_size, offset=0):
+        return self._timed("download", folder_name, super().open_file_stream, file_name, folder_name, chunk_size,
+                           offset)
+
+    def intervals(self, kind, folder_name):
+        return [(start, end) for request_kind, request_folder, start, end in self.requests
+                if request_kind == kind and request_folder == folder_name]
+
+    def most_in_flight(self):
+        # The largest number of requests running at one moment
+        events = sorted([(start, 1) for _, _, start, _ in self.requests] +
+                        [(end, -1) for _, _, _, end in self.requests])
+        in_flight = most = 0
+        for _, change in events:
+            in_flight += change
+            most = max(most, in_flight)
+        return most
+
+
+def overlap(first, second):
+    return max(first[0], second[0]) < min(first[1], second[1])
+
+
+class DownloadOverlapTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.destination = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        for folder_name, file_names in ((EXPECTED_FOLDER, EXPECTED_FILES), (ACTUAL_FOLDER, (ACTUAL_FILE,))):
+            os.makedirs(os.path.join(self.root_dir, folder_name))
+            for modified, file_name in enumerate(file_names, start=1):
+                file_path = os.path.join(self.root_dir, folder_name, file_name)
+                with open(file_path, 'wb') as f:
+                    f.write(file_name.encode() * 1000)
+                # One file a day, the last the latest
+                os.utime(file_path, (modified * 86400, modified * 86400))
+
+    def tearDown(self):
+        for directory in (self.root_dir, self.destination, self.cache_dir):
+            shutil.rmtree(directory)
+
+    def async_downloader(self, connection, max_concurrency=4):
+        downloader = DownloadData(connection, cache=DownloadCache(self.cache_dir, 1024 * 1024))
+        return AsyncDownloadData(downloader, max_concurrency=max_concurrency)
+
+    def assert_downloaded(self, file_names):
+        self.assertEqual(sorted(os.listdir(self.destination)), sorted(file_names))
+
+    def test_listing_of_one_folder_overlaps_the_download_from_another(self):
+        connection = TimedConnection(self.root_dir)
+        downloader = self.async_downloader(connection)
+        # The output folder's listing is already cached, so its file starts downloading straight away
+        downloader.run(downloader.get_files_list(ACTUAL_FOLDER))
+        downloader.run(downloader.get_files(EXPECTED_FOLDER, self.destination),
+                       downloader.get_file(ACTUAL_FILE, ACTUAL_FOLDER, self.destination))
+
+        self.assert_downloaded(EXPECTED_FILES + (ACTUAL_FILE,))
+        (listing,) = connection.intervals("listing", EXPECTED_FOLDER)
+        (download,) = connection.intervals("download", ACTUAL_FOLDER)
+        self.assertTrue(overlap(listing, download), "the Expected listing and the Actual download did not overlap")
+        # The Expected files download together once their folder is listed
+        expected_downloads = connection.intervals("download", EXPECTED_FOLDER)
+        self.assertEqual(len(expected_downloads), len(EXPECTED_FILES))
+        self.assertTrue(all(start >= listing[1] for start, _ in expected_downloads))
+        self.assertTrue(any(overlap(first, second) for first in expected_downloads for second in expected_downloads
+                            if first is not second))
+
+    def test_requests_in_flight_are_bounded_by_the_semaphore(self):
+        connection = TimedConnection(self.root_dir)
+        downloader = self.async_downloader(connection, max_concurrency=2)
+        downloader.run(downloader.get_files(EXPECTED_FOLDER, self.destination),
+                       downloader.get_file(ACTUAL_FILE, ACTUAL_FOLDER, self.destination))
+
+        self.assert_downloaded(EXPECTED_FILES + (ACTUAL_FILE,))
+        self.assertEqual(connection.most_in_flight(), 2)
+
+    def test_latest_file(self):
+        downloader = self.async_downloader(TimedConnection(self.root_dir, latency=0))
+        downloader.run(downloader.get_latest_file(EXPECTED_FOLDER, self.destination))
+        self.assert_downloaded(EXPECTED_FILES[-1:])
+
+    def test_files_modified_on_latest_date(self):
+        downloader = self.async_downloader(TimedConnection(self.root_dir, latency=0))
+        downloader.run(downloader.get_files_modified_on_latest_date(EXPECTED_FOLDER, self.destination))
+        self.assert_downloaded(EXPECTED_FILES[-1:])
+
+    def test_files_by_pattern(self):
+        downloader = self.async_downloader(TimedConnection(self.root_dir, latency=0))
+        downloader.run(downloader.get_files_by_pattern(r"_[12]\.xlsx$", EXPECTED_FOLDER, self.destination))
+        self.assert_downloaded(EXPECTED_FILES[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
+
+from dotenv import load_dotenv
+dotenv_path = os.path.join(project_root, '.env')
+load_dotenv(dotenv_path)
+
+from src.utility.DownloadCache import DownloadCache
+from src.utility.DownloadTheData import DownloadData
+from src.utility.LocalSharepointConnection import LocalSharepointConnection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FOLDER = "Library"
+FILE_NAME = "report.xlsx"
+CONTENT = bytes(range(256)) * 64
+PARTIAL = 5000
+
+
+class RecordingConnection(LocalSharepointConnection):
+    # Records the byte offset every stream is requested from, and can drop the connection after a number of bytes
+    def __init__(self, root_dir, fail_after=None):
+        super().__init__(root_dir)
+        self.offsets = []
+        self.fail_after = fail_after
+
+    def open_file_stream(self, file_name, folder_name, chunk_size, offset=0):
+        self.offsets.append(offset)
+        start, chunks = super().open_file_stream(file_name, folder_name, chunk_size, offset)
+        return start, self._failing(chunks) if self.fail_after is not None else chunks
+
+    def _failing(self, chunks):
+        sent = 0
+        for chunk in chunks:
+            chunk = chunk[:self.fail_after - sent]
+            sent += len(chunk)
+            yield chunk
+            if sent >= self.fail_after:
+                raise ValueError("connection lost")
+
+
+class DownloadResumeTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.destination = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root_dir, FOLDER))
+        with open(os.path.join(self.root_dir, FOLDER, FILE_NAME), 'wb') as f:
+            f.write(CONTENT)
+        self.file_path = os.path.join(self.destination, FILE_NAME)
+        self.part_path = f"{self.file_path}.part"
+
+    def tearDown(self):
+        for directory in (self.root_dir, self.destination, self.cache_dir):
+            shutil.rmtree(directory)
+
+    def write_partial(self, content, version):
+        with open(self.part_path, 'wb') as f:
+            f.write(content)
+        if version is not None:
+            with open(f"{self.part_path}.version", 'w', encoding='utf-8') as f:
+                f.write(version)
+
+    def download(self, connection, version, length=None):
+        DownloadData(connection).download_to_disk(FILE_NAME, FOLDER, self.file_path, version, length)
+
+    def assert_downloaded(self):
+        with open(self.file_path, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertFalse(os.path.exists(self.part_path))
+        self.assertFalse(os.path.exists(f"{self.part_path}.version"))
+
+    def test_partial_file_of_the_same_version_is_resumed(self):
+        self.write_partial(CONTENT[:PARTIAL], "v1")
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1")
+        self.assertEqual(connection.offsets, [PARTIAL])
+        self.assert_downloaded()
+
+    def test_partial_file_of_another_version_is_discarded(self):
+        self.write_partial(b"\xff" * PARTIAL, "v0")
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1")
+        self.assertEqual(connection.offsets, [0])
+        self.assert_downloaded()
+
+    def test_partial_file_without_a_version_is_discarded(self):
+        self.write_partial(b"\xff" * PARTIAL, None)
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1")
+        self.assertEqual(connection.offsets, [0])
+        self.assert_downloaded()
+
+    def test_interrupted_download_is_resumed_by_the_next_run(self):
+        with self.assertRaises(ValueError):
+            self.download(RecordingConnection(self.root_dir, fail_after=PARTIAL), "v1")
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertEqual(os.path.getsize(self.part_path), PARTIAL)
+
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1")
+        self.assertEqual(connection.offsets, [PARTIAL])
+        self.assert_downloaded()
+
+    def test_complete_partial_file_is_renamed_without_a_request(self):
+        self.write_partial(CONTENT, "v1")
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1", len(CONTENT))
+        self.assertEqual(connection.offsets, [])
+        self.assert_downloaded()
+
+    def test_complete_partial_file_of_unknown_length_is_downloaded_again(self):
+        # The mirror answers 416 to a range starting at the end of the file, as SharePoint does
+        self.write_partial(CONTENT, "v1")
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1")
+        self.assertEqual(connection.offsets, [len(CONTENT), 0])
+        self.assert_downloaded()
+
+    def test_partial_file_longer_than_the_file_is_discarded(self):
+        self.write_partial(CONTENT + b"\xff" * PARTIAL, "v1")
+        connection = RecordingConnection(self.root_dir)
+        self.download(connection, "v1", len(CONTENT))
+        self.assertEqual(connection.offsets, [0])
+        self.assert_downloaded()
+
+    def test_get_file_finalises_a_complete_partial_file_left_by_a_crash(self):
+        connection = RecordingConnection(self.root_dir)
+        downloader = DownloadData(connection, cache=DownloadCache(self.cache_dir, 1024 * 1024))
+        self.write_partial(CONTENT, str(downloader.file_version(FILE_NAME, FOLDER)))
+        downloader.get_file(FILE_NAME, FOLDER, self.destination)
+        self.assertEqual(connection.offsets, [])
+        self.assert_downloaded()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,8 @@
 import sys
 import os
-import openpyxl
 import glob
 import unittest
 import logging
-from datetime import datetime
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
@@ -14,52 +12,59 @@ from dotenv import load_dotenv
 dotenv_path = os.path.join(project_root, '.env')
 load_dotenv(dotenv_path)
 
-from src.utility.DownloadTheData import DownloadData
+from src.utility.AsyncDownloadTheData import AsyncDownloadData
+from src.utility.TempStorage import temp_storage_path
+from src.utility.WorkbookCache import workbook_cache
+from src.utility.RowReconciler import RowReconciler
+from src.utility.CellNormalizer import normalize_text, normalized_rows
+from src.utility.ReconciliationState import INCREMENTAL_RECONCILIATION, ReconciliationState
+from src.utility.Instrumentation import instrumentation, instrumented, sheet_rows
+from src.utility.Profiling import profiled
+from src.utility.ErrorCollector import ErrorCollector
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@profiled
 class FixedTermDealTestCases(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
         logger.info("Data is Downloading....")
 
-        expected_data_path = os.path.join(current_dir, '..', 'tempStorage', 'expectedData')
-        actual_data_path = os.path.join(current_dir, '..', 'tempStorage', 'actualData')
+        cls.expected_data_dir = temp_storage_path('expectedData')
+        cls.actual_data_dir = temp_storage_path('actualData')
 
-        cls.expected_data_dir = os.path.normpath(expected_data_path)
-        cls.actual_data_dir = os.path.normpath(actual_data_path)
-
-        downloader = DownloadData()
-        downloader.get_files("DEV/Saving/Inbound/Flagstone Savings Spreadsheets", cls.expected_data_dir)
-        downloader.get_file("SAVING_DEV.CONF.FLAGSTONE_FIXED_TERM_SAVING.xlsx", "DEV/Dev Data Out/Saving (Deposit)", cls.actual_data_dir)
+        # The Flagstone folder is listed while the output file downloads
+        downloader = AsyncDownloadData()
+        downloader.run(downloader.get_files("DEV/Saving/Inbound/Flagstone Savings Spreadsheets", cls.expected_data_dir),
+                       downloader.get_file("SAVING_DEV.CONF.FLAGSTONE_FIXED_TERM_SAVING.xlsx", "DEV/Dev Data Out/Saving (Deposit)", cls.actual_data_dir))
 
         logger.info("Data Downloaded")
 
     @staticmethod
+    @instrumented(rows=sheet_rows)
     def load_expected_excel(expectedExcel_file_path):
         try:
             logger.info(f"Loading expected Excel file:\n{expectedExcel_file_path}")
-            expected_workbook = openpyxl.load_workbook(expectedExcel_file_path, data_only=True)
-            if 'FTD' in expected_workbook.sheetnames:
-                sheet = expected_workbook['FTD']
-                return sheet
-            else:
-                logger.error(f"Workbook '{expectedExcel_file_path}' does not contain an 'FTD' sheet.")
-                return None
+            sheet = workbook_cache.load_sheet(expectedExcel_file_path, sheet_name='FTD')
+            return sheet
+
+        except KeyError:
+            logger.error(f"Workbook '{expectedExcel_file_path}' does not contain an 'FTD' sheet.")
+            return None
 
         except Exception as e:
             logger.error(f"Error loading {expectedExcel_file_path}: {e}")
             return None
 
     @staticmethod
+    @instrumented(rows=sheet_rows)
     def load_actual_excel(actualExcel_file_path):
         try:
             logger.info(f"Loading actual Excel file:\n{actualExcel_file_path}")
-            actual_workbook = openpyxl.load_workbook(actualExcel_file_path, data_only=True)
-            sheet = actual_workbook.active
+            sheet = workbook_cache.load_sheet(actualExcel_file_path)
             return sheet
 
         except Exception as e:
@@ -68,45 +73,16 @@ class FixedTermDealTestCases(unittest.TestCase):
 
     @classmethod
     def normalize_value(cls, value):
-        # Normalize term length
-        if isinstance(value, str) and value.endswith('M'):
-            value = value.lstrip('0')  # Remove leading zeros
-
-        # Normalize floating point precision
-        try:
-            value = round(float(value), 2)  # Round to 2 decimal places for comparison
-        except ValueError:
-            pass  # If not a number, keep the value as is
-
-        # Normalize date/time formats
-        try:
-            if 'T' in value:  # For with "T"
-                value = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S')
-        except (ValueError, TypeError):
-            pass  # If not a date, keep the value as is
-
-        return value
+        # Terms lose leading zeros, numbers round to 2 decimal places and timestamps are written as '%Y-%m-%d %H:%M:%S'
+        return normalize_text(value)
 
     @classmethod
+    @instrumented(rows=lambda rows, *args, **kwargs: len(rows))
     def get_row_values(cls, sheet, start_row, remove_first_column=False, remove_last_n_columns=0):
-        rows = []
-        for row in range(start_row, sheet.max_row + 1):
-            row_values = []
-            for col in range(1, sheet.max_column + 1):
-                if remove_first_column and col == 1:
-                    continue
-                if remove_last_n_columns and col > sheet.max_column - remove_last_n_columns:
-                    continue
-                cell_value = sheet.cell(row=row, column=col).value
-                if cell_value is not None:
-                    normalized_value = cls.normalize_value(str(cell_value).strip())
-                    row_values.append(normalized_value)
-            # Only add rows that are not empty
-            if any(row_values):
-                rows.append(tuple(row_values))  # Store each row as a tuple for easier comparison
-        return rows
+        # Each cell is normalized from its native type the way its text would be, so row tuples compare as before
+        min_col = 2 if remove_first_column else 1
+        max_col = max(sheet.max_column - remove_last_n_columns, 0) if remove_last_n_columns else sheet.max_column
+        return normalized_rows(sheet, start_row, min_col, max_col)
 
     @staticmethod
     def compare_rows(row1, row2, tolerance=1e-6):
@@ -148,32 +124,33 @@ class FixedTermDealTestCases(unittest.TestCase):
         if actual_sheet is not None:
             actual_rows = self.get_row_values(actual_sheet, 2, remove_first_column=True, remove_last_n_columns=4)
 
-            # Validate if all_expected_rows are present in actual_rows
-            matched_rows_count = 0
-            missing_rows = []
-            for expected_row in all_expected_rows:
-                found = False
-                for actual_row in actual_rows:
-                    if self.compare_rows(expected_row, actual_row):
-                        found = True
-                        matched_rows_count += 1
-                        break
-                if not found:
-                    missing_rows.append((expected_row, expected_file_rows[expected_row]))
+            # Validate if all_expected_rows are present in actual_rows, using a hash index on the actual rows
+            with instrumentation.phase("RowReconciler.reconcile", rows=len(all_expected_rows) + len(actual_rows)):
+                reconciler = RowReconciler(actual_rows, self.compare_rows)
+                if INCREMENTAL_RECONCILIATION:
+                    # Only rows added or changed since the last run are looked up
+                    state = ReconciliationState(type(self).__name__)
+                    reconciliation = reconciler.reconcile_incremental(all_expected_rows, state)
+                    state.save()
+                    logger.info(f"Reconciled {reconciliation.checked} new or changed rows, "
+                                f"{len(all_expected_rows) - reconciliation.checked} carried forward")
+                else:
+                    reconciliation = reconciler.reconcile(all_expected_rows)
+            matched_rows_count = len(reconciliation.matched)
+            missing_rows = [(row, expected_file_rows[row]) for row in reconciliation.missing]
 
             logger.info(f"Number of matched rows: {matched_rows_count}")
+            logger.info(f"Number of actual rows not in any expected file: {len(reconciliation.extra)}")
 
-            # Log and report all missing rows
+            # Log and report the missing rows, a sample of them when there are many
             if missing_rows:
-                error_msgs = []
-                for row, file_name in missing_rows:
-                    error_msgs.append(f"Row '{row}' from file '{file_name}' not found in actual data.")
-
-                error_msgs.append(f"Number of matched rows: {matched_rows_count}")
+                errors = ErrorCollector()
+                errors.add_many("Missing rows", len(missing_rows),
+                                (f"Row '{row}' from file '{file_name}' not found in actual data."
+                                 for row, file_name in missing_rows))
 
-                # Join all error messages into a single message
-                error_msg = "<br/>".join(error_msgs)
-                logger.error(error_msg)
+                error_msg = f"{errors.summary()}<br/>Number of matched rows: {matched_rows_count}"
+                logger.error(f"Number of matched rows: {matched_rows_count}")
 
                 # Fail the test with the error message
                 self.fail(error_msg)
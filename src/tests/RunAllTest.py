@@ -1,18 +1,66 @@
+import os
+import sys
+import logging
 import unittest
+import importlib
 from HtmlTestRunner import HTMLTestRunner
 
-# Import test cases from both files
-from FixedTermDeal_test import FixedTermDealTestCases
-from DailyInterestRateForFTD_test import DailyInterestRateForFTDTestCases
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
+sys.path.append(project_root)
 
-def suite():
+from src.utility.ParallelTestRunner import run_in_parallel, replay_suite
+from src.utility.HtmlReport import ReportResult, write_timing_report
+from src.utility.Instrumentation import instrumentation
+from src.utility.Profiling import PROFILE_TESTS, profiler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Test classes run at the same time; 1 runs them one after another in this process
+RUN_ALL_WORKERS = int(os.environ.get("RUN_ALL_WORKERS", "0"))
+# The ETL validations reported on; the downloader's own tests in this folder are run separately
+TEST_CLASSES = [
+    ("AssetsData_test", "AssetsDataTestCases"),
+    ("DailyInterestRateForFTD_test", "DailyInterestRateForFTDTestCases"),
+    ("FixedTermDeal_test", "FixedTermDealTestCases"),
+    ("SCVData_test", "SCVDataTestCases"),
+]
+
+
+class ClassSuite(unittest.TestSuite):
+    # Runs one test class, so that phases in its setUpClass are timed under the class
+    def __init__(self, test_class):
+        super().__init__(unittest.TestLoader().loadTestsFromTestCase(test_class))
+        self.test_class = test_class
+
+    def run(self, result, debug=False):
+        instrumentation.scope = self.test_class.__name__
+        return super().run(result, debug)
+
+
+def suite(test_classes):
     test_suite = unittest.TestSuite()
-    loader = unittest.TestLoader()
-    test_suite.addTests(loader.loadTestsFromTestCase(FixedTermDealTestCases))
-    test_suite.addTests(loader.loadTestsFromTestCase(DailyInterestRateForFTDTestCases))
+    for module_name, class_name in test_classes:
+        test_suite.addTest(ClassSuite(getattr(importlib.import_module(module_name), class_name)))
     return test_suite
 
 
 if __name__ == '__main__':
-    runner = HTMLTestRunner(output="./test_reports")
-    runner.run(suite())
+    test_classes = TEST_CLASSES
+    # Every class in one report
+    runner = HTMLTestRunner(output="./test_reports", resultclass=ReportResult, combine_reports=True,
+                            report_name="TestResults")
+    if RUN_ALL_WORKERS == 1:
+        result = runner.run(suite(test_classes))
+        timings = instrumentation.take_records()
+    else:
+        # Each class runs in its own process with its own tempStorage; the results are merged into one report
+        class_results = run_in_parallel(test_classes, current_dir, RUN_ALL_WORKERS or None)
+        result = runner.run(replay_suite(class_results))
+        timings = [record for class_result in class_results for record in class_result["timings"]]
+    # Download, load, and validation phase timings of every class, as a table in the reports and as JSON
+    write_timing_report(runner, result, timings)
+    if PROFILE_TESTS:
+        # The workers' per-test profiles combined into one table of the hottest functions
+        profiler.write_hot_functions()
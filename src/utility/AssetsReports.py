@@ -0,0 +1,156 @@
+import pandas as pd
+
+from src.utility.MetricEngine import MetricRegistry, Sum, WeightedSum, Count, Max, Min, Ratio
+
+asset_reports = MetricRegistry()
+
+# Shared predicates over the loan tape; each one is evaluated once per tape for all reports
+asset_reports.register_filter("april", lambda tape: tape.reported_in("April"))  # Dates
+asset_reports.register_filter("may", lambda tape: tape.reported_in("May"))  # Dates
+asset_reports.register_filter("dated", lambda tape: tape.is_dated())  # Dates
+asset_reports.register_filter("before_last_row",  # Risk Appetite, Owner Occupied and BTL never read the last row
+                              lambda tape: pd.Series(range(len(tape)), index=tape.frame.index) < len(tape) - 1)
+asset_reports.register_filter("owner_occupied", lambda tape: tape["AR130"] == 1)  # AR130
+asset_reports.register_filter("not_owner_occupied", lambda tape: tape["AR130"] != 1)  # AR130
+asset_reports.register_filter("buy_to_let", lambda tape: tape["AR130"] == 3)  # AR130
+asset_reports.register_filter("residential_property", lambda tape: tape["AR131"].isin([1, 2, 3, 4]))  # AR131
+asset_reports.register_filter("commercial_property", lambda tape: tape["AR131"].isin([5, 6, 7, 8, 9]))  # AR131
+asset_reports.register_filter("sme_property", lambda tape: tape["AR131"].isin([10, 11]))  # AR131
+asset_reports.register_filter("corporate_borrower", lambda tape: tape["AR15"].isin(["COM", "SCI"]))  # AR15
+asset_reports.register_filter("first_lien", lambda tape: tape["AR84"] == 1)  # AR84
+asset_reports.register_filter("not_first_lien", lambda tape: tape["AR84"] != 1)  # AR84
+asset_reports.register_filter("foreign_currency", lambda tape: tape["AR65"] == 2)  # AR65
+asset_reports.register_filter("positive_balance", lambda tape: tape["AR67"] > 0)  # AR67
+asset_reports.register_filter("with_balance", lambda tape: tape["AR67"].notna() & (tape["AR67"] != 0))  # AR67
+asset_reports.register_filter("interest_only", lambda tape: tape["AR69"] == 1)  # AR69
+asset_reports.register_filter("repayment", lambda tape: tape["AR69"] == 2)  # AR69
+asset_reports.register_filter("part_and_part", lambda tape: tape["AR69"] == 7)  # AR69
+asset_reports.register_filter("fixed_rate", lambda tape: tape["AR110"] == 0)  # AR110
+asset_reports.register_filter("floating_rate", lambda tape: tape["AR110"] != 0)  # AR110
+asset_reports.register_filter("high_ltv", lambda tape: tape["AR141"] >= 0.8)  # AR141
+asset_reports.register_filter("performing", lambda tape: tape["AR170"] < 0.75)  # AR170
+asset_reports.register_filter("arrears_30", lambda tape: tape["AR170"] >= 1)  # AR170
+asset_reports.register_filter("arrears_90", lambda tape: tape["AR170"] >= 3)  # AR170
+
+
+def _weighted_average(field, weight, filters, scale=1, missing_weight=None):
+    return Ratio(WeightedSum(field, weight, *filters, missing_weight=missing_weight), Sum(field, *filters), scale)
+
+
+def _share(filters, subset_filters, scale=100):
+    return Ratio(Sum("AR67", *filters, *subset_filters), Sum("AR67", *filters), scale)
+
+
+def _balance_split(filters):
+    return [
+        ("Interest only  {}", Sum("AR67", *filters, "interest_only")),
+        ("Repayment  {}", Sum("AR67", *filters, "repayment")),
+        ("Part and part  {}", Sum("AR67", *filters, "part_and_part")),
+        ("BTL  {}", Sum("AR67", *filters, "not_owner_occupied")),
+        ("Owner Occupier  {}", Sum("AR67", *filters, "owner_occupied")),
+    ]
+
+
+def _origination(product, filters):
+    loans = Sum("AR67", *filters)
+    return [
+        (product + " Loans count {}", Count(*filters)),
+        (product + " Loans Pound {}", loans),
+        (product + " average Loan size (£) {}", Ratio(loans, Count(*filters))),
+        (product + " average Interest rate {}", Ratio(WeightedSum("AR67", "AR109", *filters), loans, 100)),
+    ]
+
+
+retail_owner_occupied = ("before_last_row", "april", "owner_occupied")
+retail_buy_to_let = ("before_last_row", "april", "buy_to_let")
+asset_reports.register_report("Risk Appetite", [
+    ("Risk average_ltv {} %", _weighted_average("AR67", "AR141", retail_owner_occupied, 100)),
+    ("High LTV lending {} %", _share(retail_owner_occupied, ["high_ltv"])),
+    ("Retail income multiple new advance {} %",
+     _weighted_average("AR67", "AR73", retail_owner_occupied, 100, missing_weight=0)),
+    ("BTL Average LTV {} %", _weighted_average("AR67", "AR141", retail_buy_to_let, 100)),
+    ("BTL Average interest coverage ratio {} %", _weighted_average("AR67", "AR156", retail_buy_to_let, 100)),
+    ("BTL interest only {} %", _share(retail_buy_to_let, ["interest_only"])),
+])
+
+owner_occupied = ("before_last_row", "may", "owner_occupied")
+asset_reports.register_report("Owner Occupied Mortgage", [
+    ("LTV maximum {} %", Max("AR141", *owner_occupied, scale=100)),
+    ("1st and 2nd mortgage {} %", _share(owner_occupied, ["first_lien"])),
+    ("Equifax Score {}", _weighted_average("AR67", "AR220", owner_occupied, missing_weight=0)),
+])
+
+buy_to_let = ("before_last_row", "may", "buy_to_let")
+asset_reports.register_report("Buy to let", [
+    ("Buy to Let LTV maximum {} %", Max("AR141", *buy_to_let, scale=100)),
+    ("Buy to Let 1st and 2nd mortgage {} %", _share(buy_to_let, ["first_lien"])),
+    ("Buy to Let Equifax Score {}", _weighted_average("AR67", "AR220", buy_to_let, missing_weight=0)),
+    ("Buy to Let Currency {} %", _share(buy_to_let, ["foreign_currency"])),
+])
+
+portfolio = ("dated", "positive_balance")
+portfolio_size = Sum("AR67", *portfolio)
+asset_reports.register_report("Overall Portfolio", [
+    ("Portfolio Size {} ", portfolio_size),
+    ("Wav. Loan Size {} ", Ratio(portfolio_size, Count(*portfolio))),
+    ("Wav. Current Rate {} ", _weighted_average("AR67", "AR109", portfolio, 100)),
+    ("% Fixed {}%", Ratio(Sum("AR67", "dated", "fixed_rate"), portfolio_size)),
+    ("% Floating {}%", Ratio(Sum("AR67", "dated", "floating_rate"), portfolio_size, 100)),
+    ("% Wav Term (Months) {}", Ratio(WeightedSum("AR67", "AR61", "dated", "with_balance"), portfolio_size)),
+    ("% Wav Credit Score {}", Ratio(WeightedSum("AR67", "AR46", "dated", "with_balance"), portfolio_size)),
+    ("% Performing {}", Sum("AR67", "dated", "performing")),
+    ("% =========================================================", None),
+    ("% Count Portfolio Size {}", Count(*portfolio)),
+    ("% Count Fixed {}", Ratio(Count(*portfolio, "fixed_rate"), Count(*portfolio), 100)),
+    ("% Count Floating {}%", Ratio(Count(*portfolio, "floating_rate"), Count(*portfolio), 100)),
+])
+
+residential = ("dated", "residential_property", "positive_balance")
+asset_reports.register_report("Residential Mortgages", [
+    ("Portfolio Size {} ", Sum("AR67", *residential)),
+    ("Count Portfolio Size {} ", Count(*residential)),
+    ("Interest only  {}", Sum("AR67", *residential, "interest_only")),
+    ("% Interest only  {}", _share(residential, ["interest_only"])),
+    *_balance_split(residential)[1:],
+    ("====================================================", None),
+    ("Current Ltv {}", _weighted_average("AR67", "AR141", residential, 100)),
+    ("Min Current Ltv {}", Min("AR141", "dated", "residential_property", scale=100)),
+    ("Max Current Ltv {}", Max("AR141", "dated", "residential_property", scale=100)),
+])
+
+commercial = ("dated", "commercial_property", "positive_balance")
+asset_reports.register_report("Commercial Mortgages", [
+    ("Portfolio Size {} ", Sum("AR67", *commercial)),
+    *_balance_split(commercial),
+    ("====================================================", None),
+    ("Original Ltv {}", _weighted_average("AR67", "AR135", commercial, 100)),
+    ("Current Ltv {}", _weighted_average("AR67", "AR141", commercial, 100)),
+    ("Payment due Ltv {}", _weighted_average("AR67", "AR71", commercial, 100)),
+])
+
+sme = ("dated", "sme_property", "corporate_borrower")
+asset_reports.register_report("SME Mortgages", [
+    ("Portfolio Size {} ", Sum("AR67", *sme)),
+    *_balance_split(sme),
+])
+
+asset_reports.register_report("Partner Adherence To Covenants", [
+    ("30+ % arrears {} ", Ratio(Sum("AR67", "may", "arrears_30"), Sum("AR67", "may", "with_balance"), 100)),
+    ("90+ % arrears {} ", Ratio(Sum("AR67", "may", "arrears_90"), Sum("AR67", "may", "with_balance"), 100)),
+])
+
+origination = ("may", "positive_balance")
+asset_reports.register_report("Origination All Product", [
+    ("Count Loans {}", Count(*origination)),
+    ("Pound Loans {}", Sum("AR67", *origination)),
+    ("Average Loan size (£) {}", Ratio(Sum("AR67", *origination), Count(*origination))),
+    ("Average Interest rate {}", Ratio(WeightedSum("AR67", "AR109", "may"), Sum("AR67", *origination), 100)),
+])
+asset_reports.register_report("Origination Residential Product", _origination(
+    "Residential", ("may", "residential_property", "first_lien", "positive_balance")))
+asset_reports.register_report("Origination Residential BTL 1st charge Product", _origination(
+    "Residential BTL 1st charge", ("may", "buy_to_let", "first_lien", "positive_balance")))
+asset_reports.register_report("Origination Residential BTL 2nd charge Product", _origination(
+    "Residential BTL 2nd charge", ("may", "not_first_lien", "positive_balance")))
+asset_reports.register_report("Origination Residential Secured SME Product", _origination(
+    "Residential Secured SME", ("may", "sme_property", "corporate_borrower", "positive_balance")))
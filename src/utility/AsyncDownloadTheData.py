@@ -0,0 +1,73 @@
+import time
+import asyncio
+import logging
+
+from src.utility.DownloadTheData import DOWNLOAD_CONCURRENCY, DownloadData
+from src.utility.Instrumentation import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDownloadData:
+    # DownloadData's listing and download methods as coroutines. The SharePoint client is synchronous, so each request
+    # runs on a worker thread, at most max_concurrency at a time across everything gathered together; a folder
+    # listing waits for nothing but a free slot, so listings of one folder run while files of another download
+    def __init__(self, downloader=None, max_concurrency=DOWNLOAD_CONCURRENCY):
+        self.downloader = downloader or DownloadData()
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+
+    def _slots(self):
+        # A semaphore belongs to one event loop, and run() starts a new loop each time
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def _call(self, func, *args):
+        async with self._slots():
+            return await asyncio.to_thread(func, *args)
+
+    async def get_folder_listing(self, folder_name):
+        return await self._call(self.downloader.with_retry, self.downloader.connection.get_folder_listing, folder_name)
+
+    async def get_files_list(self, folder_name):
+        return (await self.get_folder_listing(folder_name)).files
+
+    async def get_file(self, file_name, folder_name, folder_destination):
+        await self._call(self.downloader.get_file, file_name, folder_name, folder_destination)
+        logger.info(f"Downloaded {file_name} ({self.downloader.sizes[file_name] / 1e6:.1f} MB in "
+                    f"{self.downloader.timings[file_name]:.2f}s)")
+
+    async def get_all(self, file_names, folder_name, folder_destination):
+        await asyncio.gather(*(self.get_file(file_name, folder_name, folder_destination) for file_name in file_names))
+
+    async def get_files(self, folder_name, folder_destination):
+        listing = await self.get_folder_listing(folder_name)
+        await self.get_all([file.name for file in listing.files], folder_name, folder_destination)
+
+    async def get_latest_file(self, folder_name, folder_destination):
+        listing = await self.get_folder_listing(folder_name)
+        await self.get_file(listing.latest_file().name, folder_name, folder_destination)
+
+    async def get_files_modified_on_latest_date(self, folder_name, folder_destination):
+        listing = await self.get_folder_listing(folder_name)
+        files_list = listing.files_modified_on(listing.latest_modified)
+        await self.get_all([file.name for file in files_list], folder_name, folder_destination)
+
+    async def get_files_by_pattern(self, keyword, folder_name, folder_destination):
+        listing = await self.get_folder_listing(folder_name)
+        await self.get_all([file.name for file in listing.matching(keyword)], folder_name, folder_destination)
+
+    def run(self, *coroutines):
+        # Runs the coroutines together from synchronous code such as setUpClass, timed as one download phase
+        async def gather():
+            return await asyncio.gather(*coroutines)
+
+        start = time.perf_counter()
+        with instrumentation.phase("AsyncDownloadData.run"):
+            results = asyncio.run(gather())
+        logger.info(f"{len(coroutines)} download requests finished in {time.perf_counter() - start:.2f}s")
+        return results
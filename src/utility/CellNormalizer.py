@@ -0,0 +1,82 @@
+import functools
+from datetime import datetime
+
+# Distinct text and date values whose normalized form is kept; reference numbers are mostly unique, terms,
+# currencies and dates repeat
+NORMALIZE_CACHE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def normalize_text(value):
+    # Normalize term length
+    if isinstance(value, str) and value.endswith('M'):
+        value = value.lstrip('0')  # Remove leading zeros
+
+    # Normalize floating point precision
+    try:
+        value = round(float(value), 2)  # Round to 2 decimal places for comparison
+    except ValueError:
+        pass  # If not a number, keep the value as is
+
+    # Normalize date/time formats; both formats start with a four digit year, so nothing else is parsed
+    if isinstance(value, str) and value[:4].isdigit() and value[4:5] == '-':
+        try:
+            if 'T' in value:  # For with "T"
+                value = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').strftime('%Y-%m-%d %H:%M:%S')
+            else:
+                value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass  # If not a date, keep the value as is
+
+    return value
+
+
+def _normalize_str(value):
+    return normalize_text(value.strip())
+
+
+def _normalize_number(value):
+    # str() of an int or float parses back to the same float
+    try:
+        return round(float(value), 2)
+    except OverflowError:
+        return normalize_text(str(value))
+
+
+def _normalize_bool(value):
+    return str(value)
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def _normalize_cached(value):
+    return normalize_text(str(value).strip())
+
+
+def _normalize_other(value):
+    # Dates, times and anything else go through their text form, once per distinct value
+    try:
+        return _normalize_cached(value)
+    except TypeError:  # unhashable
+        return normalize_text(str(value).strip())
+
+
+# Each cell type normalizes the way its text would: numbers round to 2 places, booleans stay "True"/"False"
+_NORMALIZERS = {str: _normalize_str, float: _normalize_number, int: _normalize_number, bool: _normalize_bool}
+
+
+def normalize_cell(value):
+    return _NORMALIZERS.get(type(value), _normalize_other)(value)
+
+
+def normalized_rows(sheet, start_row, min_col=1, max_col=None):
+    # Non-empty cells of columns min_col..max_col, normalized; rows with no truthy value are left out
+    max_col = sheet.max_column if max_col is None else max_col
+    if max_col < min_col:
+        return []
+    normalizers = _NORMALIZERS
+    rows = []
+    for row in sheet.iter_rows(min_row=start_row, min_col=min_col, max_col=max_col, values_only=True):
+        row_values = tuple(normalizers.get(type(value), _normalize_other)(value) for value in row if value is not None)
+        if any(row_values):
+            rows.append(row_values)
+    return rows
@@ -1,8 +1,18 @@
 import environ
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
 from office365.sharepoint.client_context import ClientContext
+from office365.runtime.auth.authentication_context import AuthenticationContext
 from office365.runtime.auth.user_credential import UserCredential
+from office365.runtime.http.http_method import HttpMethod
+from office365.runtime.http.request_options import RequestOptions
+from office365.runtime.odata.odata_request import ODataRequest
+from office365.runtime.odata.v3.json_light_format import JsonLightFormat
 from office365.sharepoint.files.file import File
-import datetime
+from src.utility.FolderListing import folder_listing_cache
 
 # Initialize environment variables
 env = environ.Env()
@@ -14,17 +24,100 @@ PASSWORD = env("SHAREPOINT_PASSWORD")
 SHAREPOINT_SITE = env("SHAREPOINT_URL_SITE")
 SHAREPOINT_SITE_NAME = env("SHAREPOINT_SITE_NAME")
 SHAREPOINT_DOC = env("SHAREPOINT_DOC_LIBRARY")
+# Authentication cookies are renewed after this long, ahead of SharePoint expiring them
+SESSION_TTL_MINUTES = env.int("SHAREPOINT_SESSION_TTL_MINUTES", default=50)
+# Kept-alive HTTP connections to the site, shared by all threads
+HTTP_POOL_SIZE = env.int("SHAREPOINT_HTTP_POOL_SIZE", default=16)
+AUTH_FAILURE_STATUS_CODES = (401, 403)
+
+logger = logging.getLogger(__name__)
+
+
+class SharepointSession:
+    # Authenticates once per TTL and shares the cookies and a pooled requests.Session across every call and thread
+    def __init__(self, ttl_seconds=SESSION_TTL_MINUTES * 60):
+        self.ttl_seconds = ttl_seconds
+        self.auth_context = AuthenticationContext(SHAREPOINT_SITE)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self.generation = 0  # bumped on every authentication
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def ensure_authenticated(self, stale_generation=None):
+        # Passing the generation a request failed with forces a refresh, unless another thread already did it
+        with self._lock:
+            if stale_generation is None and time.monotonic() < self._expires_at:
+                return
+            if stale_generation is not None and stale_generation != self.generation:
+                return
+            self.auth_context.register_provider(UserCredential(USERNAME, PASSWORD))
+            self.auth_context.authenticate_request(RequestOptions(SHAREPOINT_SITE))
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            self.generation += 1
+            logger.info("Authenticated to SharePoint")
+
+    def context(self):
+        # ClientContext queues queries, so each thread gets its own on top of the shared authentication
+        self.ensure_authenticated()
+        conn = getattr(self._local, "context", None)
+        if conn is None:
+            conn = self._local.context = PooledClientContext(self)
+        return conn
+
+
+class PooledODataRequest(ODataRequest):
+    def execute_request_direct(self, request):
+        session = self.context.session
+        generation = session.generation
+        response = self._send(request)
+        if response.status_code in AUTH_FAILURE_STATUS_CODES:
+            session.ensure_authenticated(stale_generation=generation)
+            response = self._send(request)
+        return response
+
+    def _send(self, request):
+        self.context.authenticate_request(request)
+        send_json = request.method in (HttpMethod.Post, HttpMethod.Patch) and not (request.is_bytes or request.is_file)
+        return self.context.session.http.request(request.method, request.url,
+                                                 headers=request.headers,
+                                                 data=None if send_json else request.data,
+                                                 json=request.data if send_json else None,
+                                                 auth=request.auth,
+                                                 verify=request.verify,
+                                                 stream=request.stream,
+                                                 proxies=request.proxies)
+
+
+class PooledClientContext(ClientContext):
+    def __init__(self, session):
+        super().__init__(SHAREPOINT_SITE, session.auth_context)
+        self.session = session
+
+    def pending_request(self):
+        if self._pending_request is None:
+            self._pending_request = PooledODataRequest(self, JsonLightFormat())
+            self._pending_request.beforeExecute += self._build_modification_query
+        return self._pending_request
+
+
+def _iter_response(response, chunk_size):
+    with response:
+        yield from response.iter_content(chunk_size)
 
 
 class SharepointConnection:
+    _session = None
+    _session_lock = threading.Lock()
+
     def _auth(self):
-        conn = ClientContext(SHAREPOINT_SITE).with_credentials(
-            UserCredential(
-                USERNAME,
-                PASSWORD
-            )
-        )
-        return conn
+        with SharepointConnection._session_lock:
+            if SharepointConnection._session is None:
+                SharepointConnection._session = SharepointSession()
+        return SharepointConnection._session.context()
 
     def get_files_list(self, folder_name):
         conn = self._auth()
@@ -33,43 +126,43 @@ class SharepointConnection:
         root_folder.expand(["Files", "Folders"]).get().execute_query()
         return root_folder.files
 
+    def file_url(self, file_name, folder_name):
+        return f'/sites/{SHAREPOINT_SITE_NAME}/{SHAREPOINT_DOC}/{folder_name}/{file_name}'
+
     def download_file(self, file_name, folder_name):
         conn = self._auth()
-        file_url = f'/sites/{SHAREPOINT_SITE_NAME}/{SHAREPOINT_DOC}/{folder_name}/{file_name}'
-        file = File.open_binary(conn, file_url)
+        file = File.open_binary(conn, self.file_url(file_name, folder_name))
+        # open_binary does not check the status, so a throttled response would otherwise be saved as the file
+        file.raise_for_status()
         return file.content
 
+    def open_file_stream(self, file_name, folder_name, chunk_size, offset=0):
+        # Returns the byte position the chunks start at: offset when the server honours the Range header, else 0
+        conn = self._auth()
+        request = RequestOptions(
+            r"web/getFileByServerRelativePath(DecodedUrl='{0}')/\$value".format(self.file_url(file_name, folder_name)))
+        request.method = HttpMethod.Get
+        request.stream = True
+        if offset:
+            request.set_header("Range", f"bytes={offset}-")
+        response = conn.execute_request_direct(request)
+        response.raise_for_status()
+        start = offset if response.status_code == 206 else 0
+        return start, _iter_response(response, chunk_size)
+
+    def listing_key(self, folder_name):
+        return f'{SHAREPOINT_SITE}/{SHAREPOINT_DOC}/{folder_name}'
+
+    def get_folder_listing(self, folder_name):
+        return folder_listing_cache.get(self.listing_key(folder_name), lambda: self.get_files_list(folder_name))
+
     def download_latest_file(self, folder_name):
-        date_format = "%Y-%m-%dT%H:%M:%SZ"
-        files_list = self.get_files_list(folder_name)
-        file_dict = {}
-        for file in files_list:
-            dt_obj = datetime.datetime.strptime(file.time_last_modified, date_format)
-            file_dict[file.name] = dt_obj
-        file_dict_sorted = {key: value for key, value in sorted(file_dict.items(), key=lambda item: item[1], reverse=True)}
-        latest_file_name = next(iter(file_dict_sorted))
+        latest_file_name = self.get_folder_listing(folder_name).latest_file().name
         content = self.download_file(latest_file_name, folder_name)
         return latest_file_name, content
 
     def get_latest_modified_date(self, folder_name):
-        date_format = "%Y-%m-%dT%H:%M:%SZ"
-        files_list = self.get_files_list(folder_name)
-        latest_date = None
-        for file in files_list:
-            dt_obj = datetime.datetime.strptime(file.time_last_modified, date_format)
-            if latest_date is None or dt_obj > latest_date:
-                latest_date = dt_obj
-        return latest_date
+        return self.get_folder_listing(folder_name).latest_modified
 
     def get_files_modified_on_date(self, folder_name, target_date):
-        date_format = "%Y-%m-%dT%H:%M:%SZ"
-        files_list = self.get_files_list(folder_name)
-        target_date_str = target_date.strftime("%Y-%m-%d")
-        filtered_files = []
-        for file in files_list:
-            dt_obj = datetime.datetime.strptime(file.time_last_modified, date_format)
-            if dt_obj.strftime("%Y-%m-%d") == target_date_str:
-                filtered_files.append(file)
-        return filtered_files
-
-
+        return self.get_folder_listing(folder_name).files_modified_on(target_date)
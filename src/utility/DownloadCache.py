@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import environ
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+env = environ.Env()
+
+# Downloaded files are kept here between runs, outside the folders the test classes clean up
+DOWNLOAD_CACHE_DIR = env("DOWNLOAD_CACHE_DIR", default=os.path.join(os.path.dirname(__file__), '..', 'tempStorage',
+                                                                     'cache'))
+# Disk budget for cached files; 0 turns the cache off
+DOWNLOAD_CACHE_BUDGET_MB = env.int("DOWNLOAD_CACHE_BUDGET_MB", default=4096)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCache:
+    # Content-addressed store: blobs are named by their sha256, and index.json maps each file URL to the blob
+    # and the version (ETag or time_last_modified) it was downloaded at. Parallel test workers share the folder, so
+    # every change re-reads index.json under a file lock and writes it back before the lock is released
+    def __init__(self, cache_dir, budget_bytes):
+        self.cache_dir = os.path.normpath(cache_dir)
+        self.budget_bytes = budget_bytes
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.lock_path = os.path.join(self.cache_dir, 'index.lock')
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    @contextmanager
+    def _locked_index(self):
+        # The latest index of every process, saved again on the way out
+        with self._lock, open(self.lock_path, 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                self._index = self._load_index()
+                yield self._index
+                self._save_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(temp_path, self.index_path)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, digest)
+
+    @staticmethod
+    def file_digest(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def fetch(self, url, version, destination):
+        # Copies the cached file to destination if it is still at version, keeping its mtime
+        with self._locked_index() as index:
+            entry = index.get(url)
+            if entry is None or entry["version"] != version:
+                return False
+            blob_path = self._blob_path(entry["blob"])
+            if not os.path.exists(blob_path):
+                del index[url]
+                return False
+            entry["used"] = time.time()  # saved with the index, so eviction is least recently used across runs
+        try:
+            shutil.copy2(blob_path, destination)
+        except FileNotFoundError:
+            # Evicted by another process since the index was read
+            logger.info(f"Download cache miss, blob evicted meanwhile: {url}")
+            return False
+        logger.info(f"Download cache hit: {url}")
+        return True
+
+    def store(self, url, version, path):
+        digest = self.file_digest(path)
+        size = os.path.getsize(path)
+        with self._locked_index() as index:
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+                os.close(fd)
+                shutil.copy2(path, temp_path)
+                os.replace(temp_path, blob_path)
+            index[url] = {"version": version, "blob": digest, "size": size, "used": time.time()}
+            self._evict(keep=url)
+
+    def _evict(self, keep):
+        blob_sizes = {entry["blob"]: entry["size"] for entry in self._index.values()}
+        used_bytes = sum(blob_sizes.values())
+        for url, entry in sorted(self._index.items(), key=lambda item: item[1]["used"]):
+            if used_bytes <= self.budget_bytes:
+                break
+            if url == keep:
+                continue
+            del self._index[url]
+            # A blob shared by several URLs stays until the last of them is evicted
+            if all(other["blob"] != entry["blob"] for other in self._index.values()):
+                used_bytes -= entry["size"]
+                try:
+                    os.remove(self._blob_path(entry["blob"]))
+                except FileNotFoundError:
+                    pass  # removed by another process
+                except PermissionError:
+                    logger.warning(f"Download cache could not remove the blob of {url}, it is being copied")
+                logger.info(f"Download cache evicted: {url}")
+
+    def clear(self):
+        with self._locked_index() as index:
+            for entry in index.values():
+                blob_path = self._blob_path(entry["blob"])
+                if os.path.exists(blob_path):
+                    os.remove(blob_path)
+            index.clear()
+
+
+_download_cache = None
+_download_cache_lock = threading.Lock()
+
+
+def default_download_cache():
+    global _download_cache
+    if DOWNLOAD_CACHE_BUDGET_MB <= 0:
+        return None
+    with _download_cache_lock:
+        if _download_cache is None:
+            _download_cache = DownloadCache(DOWNLOAD_CACHE_DIR, DOWNLOAD_CACHE_BUDGET_MB * 1024 * 1024)
+        return _download_cache
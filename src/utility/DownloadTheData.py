@@ -1,39 +1,181 @@
 from src.utility.ConnectToSharepoint import SharepointConnection
-import re
+from src.utility.DownloadCache import default_download_cache
+from src.utility.Instrumentation import instrumented
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import PurePath
 
+import environ
+import requests
+
+env = environ.Env()
+
+# Number of files downloaded at the same time
+DOWNLOAD_CONCURRENCY = env.int("SHAREPOINT_DOWNLOAD_CONCURRENCY", default=4)
+# Retries of a throttled download, waiting RETRY_BACKOFF_SECONDS * 2^attempt unless the server sends Retry-After
+DOWNLOAD_RETRIES = env.int("SHAREPOINT_DOWNLOAD_RETRIES", default=5)
+RETRY_BACKOFF_SECONDS = env.float("SHAREPOINT_RETRY_BACKOFF_SECONDS", default=1.0)
+THROTTLING_STATUS_CODES = (429, 503)
+# Answer to a Range starting at or past the end of the file
+RANGE_NOT_SATISFIABLE = 416
+# Dropped connections are retried too, resuming from the bytes already written
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+# Files are streamed to disk in chunks of this size, so memory use does not grow with the file
+DOWNLOAD_CHUNK_SIZE = env.int("SHAREPOINT_DOWNLOAD_CHUNK_KB", default=1024) * 1024
+# Set to serve downloads from a local mirror of the document library instead of SharePoint
+SHAREPOINT_LOCAL_ROOT = env("SHAREPOINT_LOCAL_ROOT", default="")
+# Seconds each request to the local mirror waits, standing in for the round trip to SharePoint
+SHAREPOINT_LOCAL_LATENCY = env.float("SHAREPOINT_LOCAL_LATENCY", default=0.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _default_connection():
+    if SHAREPOINT_LOCAL_ROOT:
+        from src.utility.LocalSharepointConnection import LocalSharepointConnection
+        return LocalSharepointConnection(SHAREPOINT_LOCAL_ROOT, latency=SHAREPOINT_LOCAL_LATENCY)
+    return SharepointConnection()
+
 
 class DownloadData:
-    def __init__(self):
-        self.connection = SharepointConnection()
+    def __init__(self, connection=None, max_workers=DOWNLOAD_CONCURRENCY, cache=None):
+        self.connection = connection or _default_connection()
+        self.max_workers = max_workers
+        self.cache = cache or default_download_cache()
+        self.timings = {}  # file name -> seconds spent downloading it
+        self.sizes = {}  # file name -> bytes
 
     def save_file(self, file_name, folder_destination, file_obj):
         file_dir_path = PurePath(folder_destination, file_name)
         with open(file_dir_path, 'wb') as f:
             f.write(file_obj)
 
+    @staticmethod
+    def _retry_wait(error, attempt):
+        if isinstance(error, TRANSIENT_ERRORS):
+            return RETRY_BACKOFF_SECONDS * 2 ** attempt
+        response = getattr(error, "response", None)
+        if response is None or response.status_code not in THROTTLING_STATUS_CODES:
+            return None
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return int(retry_after)
+        return RETRY_BACKOFF_SECONDS * 2 ** attempt
+
+    def with_retry(self, request, *args):
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            try:
+                return request(*args)
+            except Exception as e:
+                wait = self._retry_wait(e, attempt)
+                if wait is None or attempt == DOWNLOAD_RETRIES:
+                    raise
+                logger.warning(f"{request.__name__}{args} failed ({e}), retrying in {wait}s")
+                time.sleep(wait)
+
+    def file_version(self, file_name, folder_name):
+        listing = self.with_retry(self.connection.get_folder_listing, folder_name)
+        return listing.version(file_name) if file_name in listing.by_name else None
+
+    def file_length(self, file_name, folder_name):
+        listing = self.with_retry(self.connection.get_folder_listing, folder_name)
+        return listing.length(file_name) if file_name in listing.by_name else None
+
+    @instrumented()
     def get_file(self, file_name, folder_name, folder_destination):
-        file_obj = self.connection.download_file(file_name, folder_name)
-        self.save_file(file_name, folder_destination, file_obj)
+        start = time.perf_counter()
+        file_url = self.connection.file_url(file_name, folder_name)
+        file_path = PurePath(folder_destination, file_name)
+        # The folder listing carries every file's version, so checking the cache or a partial download costs no
+        # extra request
+        version = self.file_version(file_name, folder_name)
+        if version is None or not self.cache or not self.cache.fetch(file_url, version, file_path):
+            self.download_to_disk(file_name, folder_name, file_path, version,
+                                  self.file_length(file_name, folder_name))
+            if version is not None and self.cache:
+                self.cache.store(file_url, version, file_path)
+        self.timings[file_name] = time.perf_counter() - start
+        self.sizes[file_name] = os.path.getsize(file_path)
+
+    def download_to_disk(self, file_name, folder_name, file_path, version=None, length=None):
+        # Chunks go to a .part file that only replaces file_path once complete, so a failed download never leaves
+        # a truncated workbook behind. The version it was started from is kept beside it, and a later run resumes
+        # the .part unless the file has changed on the server since
+        part_path = f"{file_path}.part"
+        version_path = f"{part_path}.version"
+        if os.path.exists(part_path) and (version is None or self._part_version(version_path) != str(version)):
+            logger.info(f"Discarding the partial download of {file_name}, started from another version of the file")
+            os.remove(part_path)
+        if os.path.exists(part_path) and length is not None and os.path.getsize(part_path) > length:
+            logger.info(f"Discarding the partial download of {file_name}, it is longer than the file")
+            os.remove(part_path)
+        if version is not None:
+            with open(version_path, 'w', encoding='utf-8') as f:
+                f.write(str(version))
+        # A run stopped between the last chunk and the rename leaves a complete .part, which is only renamed
+        if length is None or not os.path.exists(part_path) or os.path.getsize(part_path) < length:
+            self.with_retry(self._stream_to_part, file_name, folder_name, part_path)
+        os.replace(part_path, file_path)
+        if os.path.exists(version_path):
+            os.remove(version_path)
+
+    @staticmethod
+    def _part_version(version_path):
+        try:
+            with open(version_path, encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _stream_to_part(self, file_name, folder_name, part_path):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        try:
+            start, chunks = self.connection.open_file_stream(file_name, folder_name, DOWNLOAD_CHUNK_SIZE, offset)
+        except requests.HTTPError as e:
+            # Nothing left past offset, where the listing gave no length to tell the .part was complete: start over
+            if not offset or getattr(e.response, "status_code", None) != RANGE_NOT_SATISFIABLE:
+                raise
+            logger.info(f"Range from byte {offset} of {file_name} not satisfiable, downloading it again")
+            os.remove(part_path)
+            start, chunks = self.connection.open_file_stream(file_name, folder_name, DOWNLOAD_CHUNK_SIZE, 0)
+        if start:
+            logger.info(f"Resuming {file_name} from byte {start}")
+        with open(part_path, 'ab' if start else 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+    def get_all(self, file_names, folder_name, folder_destination):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.get_file, file_name, folder_name, folder_destination): file_name
+                       for file_name in file_names}
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                file_name = futures[future]
+                seconds = self.timings[file_name]
+                logger.info(f"Downloaded {done}/{len(futures)}: {file_name} ({self.sizes[file_name] / 1e6:.1f} MB in "
+                            f"{seconds:.2f}s, {self.sizes[file_name] / 1e6 / max(seconds, 1e-6):.1f} MB/s)")
+        logger.info(f"Downloaded {len(futures)} files from {folder_name} in {time.perf_counter() - start:.2f}s")
 
+    @instrumented()
     def get_files(self, folder_name, folder_destination):
-        files_list = self.connection.get_files_list(folder_name)
-        for file in files_list:
-            self.get_file(file.name, folder_name, folder_destination)
+        listing = self.with_retry(self.connection.get_folder_listing, folder_name)
+        self.get_all([file.name for file in listing.files], folder_name, folder_destination)
 
+    @instrumented()
     def get_latest_file(self, folder_name, folder_destination):
-        file_name, file_obj = self.connection.download_latest_file(folder_name)
-        self.save_file(file_name, folder_destination, file_obj)
+        listing = self.with_retry(self.connection.get_folder_listing, folder_name)
+        self.get_file(listing.latest_file().name, folder_name, folder_destination)
 
+    @instrumented()
     def get_files_modified_on_latest_date(self, folder_name, folder_destination):
-        latest_date = self.connection.get_latest_modified_date(folder_name)
-        files_list = self.connection.get_files_modified_on_date(folder_name, latest_date)
-        for file in files_list:
-            file_obj = self.connection.download_file(file.name, folder_name)
-            self.save_file(file.name, folder_destination, file_obj)
+        listing = self.with_retry(self.connection.get_folder_listing, folder_name)
+        files_list = listing.files_modified_on(listing.latest_modified)
+        self.get_all([file.name for file in files_list], folder_name, folder_destination)
 
+    @instrumented()
     def get_files_by_pattern(self, keyword, folder_name, folder_destination):
-        files_list = self.connection.get_files_list(folder_name)
-        for file in files_list:
-            if re.search(keyword, file.name):
-                self.get_file(file.name, folder_name, folder_destination)
\ No newline at end of file
+        listing = self.with_retry(self.connection.get_folder_listing, folder_name)
+        self.get_all([file.name for file in listing.matching(keyword)], folder_name, folder_destination)
@@ -0,0 +1,62 @@
+import logging
+from itertools import islice
+
+import environ
+
+env = environ.Env()
+
+# Messages kept, logged and reported per check; further errors of the check are only counted
+ERROR_SAMPLES_PER_CHECK = env.int("ERROR_SAMPLES_PER_CHECK", default=20)
+# Stop a test at its first check once this many errors are counted, 0 to always run every check
+ERROR_FAIL_FAST_AFTER = env.int("ERROR_FAIL_FAST_AFTER", default=0)
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorBudgetExceeded(AssertionError):
+    # An AssertionError, so the test is reported as failed with the summary rather than errored
+    pass
+
+
+class ErrorCollector:
+    def __init__(self, samples=ERROR_SAMPLES_PER_CHECK, fail_fast_after=ERROR_FAIL_FAST_AFTER):
+        self.samples = samples
+        self.fail_fast_after = fail_fast_after
+        self.counts = {}  # check -> errors counted
+        self.sampled = {}  # check -> messages kept
+        self.messages = []  # kept messages of every check, in the order they were added
+        self.total = 0
+
+    def __bool__(self):
+        return self.total > 0
+
+    def add(self, check, message):
+        self.add_many(check, 1, (message,))
+
+    def add_many(self, check, count, messages):
+        # count errors of check, described by messages; only as many messages as are still sampled are read, so a
+        # generator of formatted messages is never exhausted for a broken column
+        if count <= 0:
+            return
+        sampled = self.sampled.get(check, 0)
+        kept = list(islice(messages, max(min(self.samples - sampled, count), 0)))
+        for message in kept:
+            logger.error(message)
+        self.messages.extend(kept)
+        self.sampled[check] = sampled + len(kept)
+        previous = self.counts.get(check, 0)
+        self.counts[check] = previous + count
+        if previous + count > self.samples >= previous:
+            logger.error(f"{check}: more than {self.samples} errors, the rest are only counted")
+        self.total += count
+        if self.fail_fast_after and self.total >= self.fail_fast_after:
+            raise ErrorBudgetExceeded(f"Stopped after {self.total} errors (ERROR_FAIL_FAST_AFTER="
+                                      f"{self.fail_fast_after})<br/>{self.summary()}")
+
+    def summary(self, separator="<br/>"):
+        # The kept messages, then the number of errors left out of each check
+        lines = list(self.messages)
+        for check, count in self.counts.items():
+            if count > self.sampled[check]:
+                lines.append(f"{check}: {count - self.sampled[check]} more of {count} errors not shown")
+        return separator.join(lines)
@@ -0,0 +1,116 @@
+import numpy as np
+import openpyxl
+
+
+class SheetCell:
+    def __init__(self, value):
+        self.value = value
+
+
+class SheetData:
+    # Projected columns of a worksheet held as plain value lists, keeping the sheet's row and column numbers
+    def __init__(self, columns, min_row, max_row, max_column):
+        self.columns = columns  # column number -> values of rows min_row..max_row, as a list or a snapshot column
+        self.min_row = min_row
+        self.max_row = max_row
+        self.max_column = max_column
+
+    def column_values(self, column, min_row=None, max_row=None):
+        start = (min_row or self.min_row) - self.min_row
+        stop = (max_row or self.max_row) - self.min_row + 1
+        if column not in self.columns:
+            return [None] * max(stop - start, 0)
+        values = self.columns[column][start:stop]
+        # tolist turns numpy scalars back into the Python values openpyxl returned
+        return values.tolist() if isinstance(values, np.ndarray) else values
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=True):
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        column_values = [self.column_values(column, min_row, max_row) for column in range(min_col, max_col + 1)]
+        return zip(*column_values)
+
+    def cell(self, row, column):
+        if column not in self.columns or not self.min_row <= row <= self.max_row:
+            return SheetCell(None)
+        value = self.columns[column][row - self.min_row]
+        return SheetCell(value.item() if isinstance(value, np.generic) else value)
+
+    @staticmethod
+    def memory_usage(sheet_data):
+        return sum(values.nbytes if getattr(values, "dtype", object) != object else len(values) * 50
+                   for values in sheet_data.columns.values())
+
+
+def _resolve_columns(sheet, columns, header_row):
+    # Columns are 1-based numbers or header names from header_row
+    header = None
+    resolved = []
+    for column in columns:
+        if isinstance(column, int):
+            resolved.append(column)
+            continue
+        if header is None:
+            header = next(sheet.iter_rows(min_row=header_row or 1, max_row=header_row or 1, values_only=True), ())
+        if column not in header:
+            raise KeyError(f"Column '{column}' not found in header row {header_row or 1}")
+        resolved.append(header.index(column) + 1)
+    return resolved
+
+
+def _iter_projected(sheet, min_row, columns):
+    if columns is None:
+        yield from sheet.iter_rows(min_row=min_row, values_only=True)
+        return
+    min_col, max_col = min(columns), max(columns)
+    for row in sheet.iter_rows(min_row=min_row, min_col=min_col, max_col=max_col, values_only=True):
+        yield tuple(row[column - min_col] if column - min_col < len(row) else None for column in columns)
+
+
+def iter_sheet_rows(sheet, min_row=1, columns=None, header_row=None, predicate=None):
+    # The projected values of each row from min_row on, for rows where predicate(values) holds
+    if columns is not None:
+        columns = _resolve_columns(sheet, columns, header_row)
+    for values in _iter_projected(sheet, min_row, columns):
+        if predicate is None or predicate(values):
+            yield values
+
+
+def stream_rows(file_path, sheet_name=None, min_row=1, columns=None, header_row=None, predicate=None):
+    # Read-only mode parses one row at a time, so only the projected values of the selected rows are ever held
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name is not None else workbook.active
+        yield from iter_sheet_rows(sheet, min_row, columns, header_row, predicate)
+    finally:
+        workbook.close()
+
+
+def load_sheet(file_path, sheet_name=None, min_row=1, columns=None, header_row=None):
+    # Every row of the projection, kept as columns so cells are still addressed by sheet row and column number
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name is not None else workbook.active
+        if columns is not None:
+            columns = list(dict.fromkeys(_resolve_columns(sheet, columns, header_row)))
+
+        column_values = {} if columns is None else {column: [] for column in columns}
+        row_count = 0
+        for row in iter_sheet_rows(sheet, min_row, columns):
+            if columns is None:
+                # Unprojected sheets grow columns as wider rows appear
+                for column in range(len(column_values) + 1, len(row) + 1):
+                    column_values[column] = [None] * row_count
+                for column, values in column_values.items():
+                    values.append(row[column - 1] if column <= len(row) else None)
+            else:
+                for values, value in zip(column_values.values(), row):
+                    values.append(value)
+            row_count += 1
+
+        max_column = max(column_values, default=0)
+        if sheet.max_column is not None:
+            max_column = max(max_column, sheet.max_column)
+        return SheetData(column_values, min_row, min_row + row_count - 1, max_column)
+    finally:
+        workbook.close()
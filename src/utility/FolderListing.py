@@ -0,0 +1,74 @@
+import re
+import time
+import datetime
+import threading
+from collections import defaultdict
+
+import environ
+
+env = environ.Env()
+
+# How long a folder listing is reused before SharePoint is asked again
+LISTING_TTL_SECONDS = env.int("SHAREPOINT_LISTING_TTL_SECONDS", default=60)
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class FolderListing:
+    # One fetched listing of a folder, with its timestamps parsed once and indexed by name, date and pattern
+    def __init__(self, files):
+        self.files = list(files)
+        self.by_name = {file.name: file for file in self.files}
+        self.modified = {file.name: datetime.datetime.strptime(file.time_last_modified, DATE_FORMAT)
+                         for file in self.files}
+        self.by_date = defaultdict(list)
+        for file in self.files:
+            self.by_date[self.modified[file.name].date()].append(file)
+        self.latest_modified = max(self.modified.values(), default=None)
+        self._by_pattern = {}
+
+    def version(self, file_name):
+        # SharePoint returns an ETag with each listed file; the modification time stands in where it is missing
+        file = self.by_name[file_name]
+        return getattr(file, "properties", {}).get("ETag") or file.time_last_modified
+
+    def length(self, file_name):
+        # Size in bytes, None where the listing does not give it
+        length = getattr(self.by_name[file_name], "length", None)
+        return length if length is not None and length >= 0 else None
+
+    def latest_file(self):
+        # The first file carrying the newest timestamp, as the old sort-descending lookup returned
+        return max(self.files, key=lambda file: self.modified[file.name])
+
+    def files_modified_on(self, target_date):
+        return self.by_date.get(target_date.date(), [])
+
+    def matching(self, pattern):
+        if pattern not in self._by_pattern:
+            self._by_pattern[pattern] = [file for file in self.files if re.search(pattern, file.name)]
+        return self._by_pattern[pattern]
+
+
+class FolderListingCache:
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}  # key -> (listing, fetched at)
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+                return entry[0]
+        listing = FolderListing(fetch())
+        with self._lock:
+            self._entries[key] = (listing, time.monotonic())
+        return listing
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every connection in this process, so test classes listing the same folder fetch it once
+folder_listing_cache = FolderListingCache(LISTING_TTL_SECONDS)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Failing rows listed in a failure message
+ROW_SAMPLE_SIZE = 20
+
+
+class ValuePresent:
+    # Passes when at least one row of column equals expected
+    def __init__(self, column, expected, message):
+        self.column = column
+        self.expected = expected
+        self.message = message
+
+    def start(self):
+        return False
+
+    def update(self, found, frame, first_row):
+        return found or bool((frame[self.column] == self.expected).any())
+
+    def failure(self, found):
+        return None if found else RuleFailure(self.message)
+
+
+class NonEmpty:
+    # Every row of column must hold a string with something other than whitespace
+    def __init__(self, column, message):
+        self.column = column
+        self.message = message
+
+    def start(self):
+        return []
+
+    def update(self, failing_rows, frame, first_row):
+        values = frame[self.column]
+        if pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values) or \
+                isinstance(values.dtype, pd.CategoricalDtype):
+            # .str gives NaN for anything that is not a string
+            stripped = values.astype(object).str.strip()
+            ok = (stripped.notna() & (stripped != "")).to_numpy(dtype=bool)
+        else:
+            ok = np.zeros(len(values), dtype=bool)
+        failing_rows.extend((np.flatnonzero(~ok) + first_row).tolist())
+        return failing_rows
+
+    def failure(self, failing_rows):
+        return RuleFailure(self.message, failing_rows) if failing_rows else None
+
+
+class RuleFailure:
+    def __init__(self, message, rows=None):
+        self.message = message
+        self.rows = rows
+
+    def __str__(self):
+        if self.rows is None:
+            return self.message
+        sample = ", ".join(str(row) for row in self.rows[:ROW_SAMPLE_SIZE])
+        more = f" and {len(self.rows) - ROW_SAMPLE_SIZE} more" if len(self.rows) > ROW_SAMPLE_SIZE else ""
+        return f"{self.message} at {len(self.rows)} row(s): {sample}{more}"
+
+
+class RuleCheck:
+    # Evaluates every rule of a dataset over one frame or a sequence of chunks, collecting all failures
+    def __init__(self, rules):
+        self.rules = rules
+        self.states = [rule.start() for rule in rules]
+        self.missing_columns = set()  # indexes of rules whose column is not in the file
+
+    def feed(self, frame, first_row=1):
+        # first_row is the 1-based row number of the frame's first row, used in failure messages; a rule whose column
+        # is missing fails on its own while the other rules still run
+        for position, (rule, state) in enumerate(zip(self.rules, self.states)):
+            if rule.column not in frame.columns:
+                self.missing_columns.add(position)
+            elif position not in self.missing_columns:
+                self.states[position] = rule.update(state, frame, first_row)
+
+    def failures(self):
+        failures = []
+        for position, (rule, state) in enumerate(zip(self.rules, self.states)):
+            if position in self.missing_columns:
+                failures.append(RuleFailure(f"{rule.message} (column '{rule.column}' not found in the file)"))
+                continue
+            failure = rule.failure(state)
+            if failure is not None:
+                failures.append(failure)
+        return failures
+
+
+class RuleRegistry:
+    def __init__(self, skip_trailer=True):
+        self.skip_trailer = skip_trailer  # the last row of each file is a trailer and is never checked
+        self.datasets = {}
+
+    def register_rules(self, dataset, rules):
+        self.datasets[dataset] = rules
+
+    def check(self, dataset, frame):
+        check = RuleCheck(self.datasets[dataset])
+        check.feed(frame.iloc[:-1] if self.skip_trailer else frame)
+        return check.failures()
+
+    def check_chunks(self, dataset, chunks):
+        # chunks are (frame, first row number) pairs that already leave out the trailer
+        check = RuleCheck(self.datasets[dataset])
+        for frame, first_row in chunks:
+            check.feed(frame, first_row)
+        return check.failures()
@@ -0,0 +1,62 @@
+import os
+import json
+import html
+import time
+
+from HtmlTestRunner.result import HtmlTestResult
+
+from src.utility.Instrumentation import instrumentation, summarize
+
+
+class ReportResult(HtmlTestResult):
+    # html-testRunner 1.2.1 still calls the unittest helper removed in Python 3.11 when it formats a failure
+    def _count_relevant_tb_levels(self, tb):
+        length = 0
+        while tb and not self._is_relevant_tb_level(tb):
+            length += 1
+            tb = tb.tb_next
+        return length
+
+    def startTest(self, test):
+        instrumentation.start_test(test)
+        super().startTest(test)
+
+    def stopTest(self, test):
+        recorded_time = getattr(test, "recorded_time", None)
+        if recorded_time is not None:
+            # The elapsed time is taken as stop_time - start_time when super() sets stop_time
+            self.start_time = time.time() - recorded_time
+        super().stopTest(test)
+        instrumentation.stop_test()
+
+
+def _format(value, spec):
+    return "" if value is None else format(value, spec)
+
+
+def timing_table(lines):
+    rows = "".join(
+        f"<tr><td>{html.escape(line['scope'] or '')}</td>"
+        f"<td style=\"padding-left:{line['depth'] * 1.5 + 0.5}em\">{html.escape(line['phase'])}</td>"
+        f"<td>{line['calls']}</td><td>{line['seconds']:.3f}</td><td>{_format(line['rows'], ',')}</td>"
+        f"<td>{_format(line['rows_per_second'], ',.0f')}</td><td>{_format(line['peak_mb'], '.1f')}</td></tr>"
+        for line in lines)
+    return ("<div class=\"container\"><h3>Timings</h3><table class=\"table table-condensed\">"
+            "<tr><th>Test class</th><th>Phase</th><th>Calls</th><th>Seconds</th><th>Rows</th><th>Rows/s</th>"
+            "<th>Peak MB</th></tr>" + rows + "</table></div>")
+
+
+def write_timing_report(runner, result, records):
+    # Adds every phase as a table to the combined report and writes every record to a JSON file next to it
+    lines = summarize(records)
+    for report_file in result.report_files:
+        with open(report_file, encoding="utf-8") as f:
+            report = f.read()
+        report = report.replace("</body>", timing_table(lines) + "</body>", 1)
+        with open(report_file, "w", encoding="utf-8") as f:
+            f.write(report)
+
+    json_path = os.path.join(runner.output, f"Timings_{runner.timestamp}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": runner.timestamp, "summary": lines, "records": records}, f, indent=2)
+    return json_path
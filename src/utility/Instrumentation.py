@@ -0,0 +1,137 @@
+import time
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+import environ
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+env = environ.Env()
+
+# Traces allocations so each phase reports its own peak; slows Python-heavy phases, so off by default and the
+# process peak RSS is reported instead
+INSTRUMENT_MEMORY = env.bool("INSTRUMENT_MEMORY", default=False)
+
+
+def _process_peak_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Phase:
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows  # may be set inside the with block once the row count is known
+        self.peak = 0  # traced bytes, carried up from nested phases
+
+
+class Instrumentation:
+    def __init__(self, trace_memory=INSTRUMENT_MEMORY):
+        self.trace_memory = trace_memory
+        self.records = []
+        self.scope = None  # test class the phases belong to
+        self.test = None  # test method, None during class fixtures
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def start_test(self, test):
+        self.scope = type(test).__name__
+        self.test = getattr(test, "_testMethodName", None)
+
+    def stop_test(self):
+        self.test = None
+
+    @contextmanager
+    def phase(self, name, rows=None):
+        stack = self._stack()
+        current = Phase(name, rows)
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if stack:
+                # The enclosing phase keeps its peak so far before the counter is reset for this one
+                stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(current)
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            if self.trace_memory:
+                current.peak = max(current.peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, current.peak)
+                peak_mb = current.peak / 1e6
+            else:
+                peak_mb = _process_peak_mb()
+            with self._lock:
+                self.records.append({
+                    "scope": self.scope, "test": self.test, "phase": name, "depth": len(stack),
+                    "started": started, "seconds": seconds, "rows": current.rows,
+                    "rows_per_second": current.rows / seconds if current.rows and seconds > 0 else None,
+                    "peak_mb": peak_mb,
+                })
+
+    def instrumented(self, name=None, rows=None):
+        # rows(result, *args, **kwargs) counts the rows a call processed
+        def decorator(func):
+            phase_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(phase_name) as current:
+                    result = func(*args, **kwargs)
+                    if rows is not None:
+                        current.rows = rows(result, *args, **kwargs)
+                    return result
+
+            return wrapper
+
+        return decorator
+
+    def take_records(self):
+        with self._lock:
+            records, self.records = self.records, []
+        return records
+
+
+def sheet_rows(sheet, *args, **kwargs):
+    # rows counter for the load_*_excel helpers, which return None when the workbook can't be read
+    return sheet.max_row - sheet.min_row + 1 if sheet is not None else 0
+
+
+def summarize(records):
+    # One line per (scope, phase) in order of first call: calls, total time and rows, throughput and the highest peak
+    summary = {}
+    for record in sorted(records, key=lambda record: record["started"]):
+        key = (record["scope"], record["phase"])
+        line = summary.setdefault(key, {"scope": record["scope"], "phase": record["phase"], "depth": record["depth"],
+                                        "calls": 0, "seconds": 0.0, "rows": None, "peak_mb": None})
+        line["calls"] += 1
+        line["seconds"] += record["seconds"]
+        line["depth"] = min(line["depth"], record["depth"])
+        if record["rows"] is not None:
+            line["rows"] = (line["rows"] or 0) + record["rows"]
+        if record["peak_mb"] is not None:
+            line["peak_mb"] = max(line["peak_mb"] or 0.0, record["peak_mb"])
+    for line in summary.values():
+        line["rows_per_second"] = line["rows"] / line["seconds"] if line["rows"] and line["seconds"] > 0 else None
+    return list(summary.values())
+
+
+instrumentation = Instrumentation()
+instrumented = instrumentation.instrumented
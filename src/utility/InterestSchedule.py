@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from src.utility.ReconciliationState import fingerprint
+from src.utility.TermCalendar import day_basis
+
+# Columns of the DAILY_INTEREST_RATE_FIXED_TERM output holding the daily schedule (Date .. Closing Balance Post Interest Compounding)
+FIRST_COL = 4
+LAST_COL = 18
+DATE_COL = 4
+
+
+class InterestSchedule:
+    def __init__(self, raw_values, first_row):
+        self.first_row = first_row
+        self.raw_values = raw_values  # cell values as read, used in mismatch messages
+        self.values = pd.DataFrame(raw_values).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        self.dates = pd.to_datetime(pd.Series(raw_values[:, DATE_COL - FIRST_COL]),
+                                    errors="coerce").to_numpy().astype("datetime64[us]")
+
+    @classmethod
+    def from_sheet(cls, sheet, first_row=2):
+        rows = list(sheet.iter_rows(min_row=first_row, min_col=FIRST_COL, max_col=LAST_COL, values_only=True))
+        raw_values = np.empty((len(rows), LAST_COL - FIRST_COL + 1), dtype=object)
+        for index, row in enumerate(rows):
+            raw_values[index, :] = row
+        return cls(raw_values, first_row)
+
+    @staticmethod
+    def memory_usage(schedule):
+        return schedule.raw_values.size * 100 + schedule.values.nbytes + schedule.dates.nbytes
+
+    def block(self, start_rows, no_of_days):
+        return ScheduleBlock(self, start_rows, no_of_days)
+
+
+class ScheduleBlock:
+    # The no_of_days rows of every deal starting at start_rows, stacked as (deals, days) arrays
+    def __init__(self, schedule, start_rows, no_of_days):
+        self.schedule = schedule
+        self.no_of_days = no_of_days
+        self.rows = np.asarray(start_rows)[:, None] + np.arange(no_of_days)
+        index = self.rows - schedule.first_row
+        self._in_sheet = index < len(schedule.values)
+        self._index = np.minimum(index, max(len(schedule.values) - 1, 0))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def values(self, col):
+        return np.where(self._in_sheet, self.schedule.values[self._index, col - FIRST_COL], np.nan)
+
+    def raw(self, col):
+        return np.where(self._in_sheet, self.schedule.raw_values[self._index, col - FIRST_COL], None)
+
+    def dates(self):
+        return np.where(self._in_sheet, self.schedule.dates[self._index], np.datetime64("NaT"))
+
+    def day_basis(self):
+        # Divisor of each day's interest
+        return np.broadcast_to(day_basis(self.dates()), self.rows.shape)
+
+    def fingerprints(self):
+        # One digest per deal of its rows, values and dates, plus any text in the numeric columns since mismatch
+        # messages quote it; changes whenever the deal's output block does
+        fingerprints = []
+        for deal in range(len(self)):
+            index = self._index[deal]
+            values = self.schedule.values[index]
+            text = np.isnan(values)
+            text[:, DATE_COL - FIRST_COL] = False
+            fingerprints.append(fingerprint(self.rows[deal].tobytes(), self._in_sheet[deal].tobytes(), values.tobytes(),
+                                            self.schedule.dates[index].tobytes(),
+                                            self.schedule.raw_values[index][text].tolist()))
+        return fingerprints
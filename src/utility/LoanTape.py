@@ -0,0 +1,73 @@
+import pandas as pd
+
+# Loan tape fields used by the Assets reports, as column offsets from occupancy type (AR130)
+FIELD_OFFSETS = {
+    "AR15": -115,  # borrower type
+    "AR46": -84,  # bureau score value
+    "AR61": -69,  # loan term
+    "AR65": -65,  # loan currency denomination
+    "AR67": -63,  # current balance
+    "AR69": -61,  # repayment method
+    "AR70": -60,  # payment frequency
+    "AR71": -59,  # payment due
+    "AR73": -57,  # debt to income
+    "AR84": -46,  # lien
+    "AR109": -21,  # current rate
+    "AR110": -20,  # current interest rate margin
+    "AR130": 0,  # occupancy type
+    "AR131": 1,  # property type
+    "AR135": 5,  # original loan to value
+    "AR141": 11,  # current loan to value
+    "AR156": 26,  # debt service coverage ratio
+    "AR170": 40,  # number of months in arrears
+    "AR220": 88,  # Equifax bureau score value
+    "DATE": 179,  # reporting date, e.g. "April 2024"
+}
+TEXT_FIELDS = {"AR15", "DATE"}
+
+
+class LoanTape:
+    def __init__(self, frame):
+        self.frame = frame
+
+    @staticmethod
+    def sheet_columns(col):
+        return sorted(col + offset for offset in FIELD_OFFSETS.values())
+
+    @classmethod
+    def from_sheet(cls, sheet, start_row, col):
+        values = {field: sheet.column_values(col + offset, min_row=start_row, max_row=sheet.max_row)
+                  for field, offset in FIELD_OFFSETS.items()}
+
+        frame = pd.DataFrame({
+            field: pd.Series(column_values, dtype=object) if field in TEXT_FIELDS
+            else pd.to_numeric(pd.Series(column_values, dtype=object), errors="coerce")
+            for field, column_values in values.items()
+        })
+        return cls(frame)
+
+    @staticmethod
+    def memory_usage(loan_tape):
+        return int(loan_tape.frame.memory_usage(deep=True).sum())
+
+    def __getitem__(self, field):
+        return self.frame[field]
+
+    def __len__(self):
+        return len(self.frame)
+
+    def reported_in(self, month):
+        # DATE is an object column, so .str yields NaN for dates and empty cells, which never match
+        return self.frame["DATE"].str.contains(month, regex=False, na=False).astype(bool)
+
+    def is_dated(self):
+        return self.frame["DATE"].map(bool).astype(bool)
+
+    def total(self, field, mask):
+        return self.frame[field][mask].sum()
+
+    def weighted_total(self, field, weight, mask, missing_weight=None):
+        weights = self.frame[weight][mask]
+        if missing_weight is not None:
+            weights = weights.fillna(missing_weight)
+        return (self.frame[field][mask] * weights).sum()
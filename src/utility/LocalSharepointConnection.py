@@ -0,0 +1,77 @@
+import os
+import time
+import datetime
+import threading
+
+import requests
+
+from src.utility.ConnectToSharepoint import SharepointConnection
+
+
+class LocalFile:
+    def __init__(self, name, time_last_modified, length):
+        self.name = name
+        self.time_last_modified = time_last_modified
+        self.length = length
+
+
+class LocalSharepointConnection(SharepointConnection):
+    # Serves a local mirror of the document library (<root_dir>/<folder_name>/<file>) in place of SharePoint,
+    # optionally with simulated latency and throttling, so downloads can be exercised offline
+    def __init__(self, root_dir, latency=0.0, throttle_every=0):
+        self.root_dir = root_dir
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def _request(self):
+        time.sleep(self.latency)
+        with self._lock:
+            self._requests += 1
+            throttled = self.throttle_every and self._requests % self.throttle_every == 0
+        if throttled:
+            raise self._http_error(429, "Too Many Requests", {"Retry-After": "0"})
+
+    @staticmethod
+    def _http_error(status_code, reason, headers=None):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        return requests.HTTPError(f"{status_code} {reason}", response=response)
+
+    def listing_key(self, folder_name):
+        return os.path.abspath(os.path.join(self.root_dir, folder_name))
+
+    def get_files_list(self, folder_name):
+        self._request()
+        folder_path = os.path.join(self.root_dir, folder_name)
+        files = []
+        for entry in sorted(os.scandir(folder_path), key=lambda entry: entry.name):
+            if entry.is_file():
+                stat = entry.stat()
+                modified = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
+                files.append(LocalFile(entry.name, modified.strftime("%Y-%m-%dT%H:%M:%SZ"), stat.st_size))
+        return files
+
+    def file_url(self, file_name, folder_name):
+        return os.path.abspath(os.path.join(self.root_dir, folder_name, file_name))
+
+    def download_file(self, file_name, folder_name):
+        self._request()
+        with open(self.file_url(file_name, folder_name), 'rb') as f:
+            return f.read()
+
+    def open_file_stream(self, file_name, folder_name, chunk_size, offset=0):
+        self._request()
+        file_path = self.file_url(file_name, folder_name)
+        if offset and offset >= os.path.getsize(file_path):
+            # As SharePoint answers a Range starting at or past the end of the file
+            raise self._http_error(416, "Range Not Satisfiable")
+        return offset, self._iter_file(file_path, chunk_size, offset)
+
+    @staticmethod
+    def _iter_file(file_path, chunk_size, offset):
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            yield from iter(lambda: f.read(chunk_size), b'')
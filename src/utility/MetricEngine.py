@@ -0,0 +1,137 @@
+from functools import reduce
+
+
+class Sum:
+    def __init__(self, field, *filters):
+        self.field = field
+        self.filters = frozenset(filters)
+        self.key = ("sum", field, self.filters)
+
+    def compute(self, engine):
+        return engine.loan_tape.total(self.field, engine.mask(self.filters))
+
+
+class WeightedSum:
+    def __init__(self, field, weight, *filters, missing_weight=None):
+        self.field = field
+        self.weight = weight
+        self.filters = frozenset(filters)
+        self.missing_weight = missing_weight
+        self.key = ("weighted_sum", field, weight, self.filters, missing_weight)
+
+    def compute(self, engine):
+        return engine.loan_tape.weighted_total(self.field, self.weight, engine.mask(self.filters),
+                                               missing_weight=self.missing_weight)
+
+
+class Count:
+    def __init__(self, *filters):
+        self.filters = frozenset(filters)
+        self.key = ("count", self.filters)
+
+    def compute(self, engine):
+        return int(engine.mask(self.filters).sum())
+
+
+class Max:
+    def __init__(self, field, *filters, scale=1):
+        self.field = field
+        self.filters = frozenset(filters)
+        self.scale = scale
+        self.key = ("max", field, self.filters, scale)
+
+    def compute(self, engine):
+        values = engine.loan_tape[self.field][engine.mask(self.filters)]
+        if values.empty:
+            raise ValueError(f"max() of {self.field}: no rows selected by {sorted(self.filters)}")
+        return values.max() * self.scale
+
+
+class Min:
+    def __init__(self, field, *filters, scale=1):
+        self.field = field
+        self.filters = frozenset(filters)
+        self.scale = scale
+        self.key = ("min", field, self.filters, scale)
+
+    def compute(self, engine):
+        values = engine.loan_tape[self.field][engine.mask(self.filters)]
+        if values.empty:
+            raise ValueError(f"min() of {self.field}: no rows selected by {sorted(self.filters)}")
+        return values.min() * self.scale
+
+
+class Ratio:
+    def __init__(self, numerator, denominator, scale=1):
+        self.numerator = numerator
+        self.denominator = denominator
+        self.scale = scale
+        self.key = ("ratio", numerator.key, denominator.key, scale)
+
+    def compute(self, engine):
+        # numpy would return inf or nan; an empty denominator fails the report as plain division did
+        denominator = engine.value(self.denominator)
+        if denominator == 0:
+            raise ZeroDivisionError(f"{self.numerator.key} / {self.denominator.key}: the denominator is 0")
+        return (engine.value(self.numerator) / denominator) * self.scale
+
+
+class MetricRegistry:
+    def __init__(self):
+        self.filters = {}
+        self.reports = {}
+
+    def register_filter(self, name, predicate):
+        self.filters[name] = predicate
+
+    def register_report(self, name, lines):
+        # lines are (message template, metric) pairs, logged in order
+        self.reports[name] = lines
+
+    def compute_all(self, loan_tape):
+        # Reports share one engine, and so their masks and values, but fail on their own: a report whose metric
+        # raises maps to that exception, for its own test to raise
+        engine = MetricEngine(self, loan_tape)
+        results = {}
+        for name, lines in self.reports.items():
+            try:
+                results[name] = [(template, engine.value(metric) if metric is not None else None)
+                                 for template, metric in lines]
+            except Exception as e:
+                results[name] = e
+        return results
+
+    @staticmethod
+    def report_lines(results, name):
+        result = results[name]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class MetricEngine:
+    def __init__(self, registry, loan_tape):
+        self.registry = registry
+        self.loan_tape = loan_tape
+        self._masks = {}
+        self._values = {}
+
+    def mask(self, filters):
+        # Every filter and filter combination is evaluated once for all reports
+        filters = frozenset(filters)
+        if filters not in self._masks:
+            if len(filters) == 1:
+                (name,) = filters
+                self._masks[filters] = self.registry.filters[name](self.loan_tape)
+            elif not filters:
+                self._masks[filters] = self.loan_tape.frame.index.to_series().notna()
+            else:
+                self._masks[filters] = reduce(lambda left, right: left & right,
+                                              (self.mask([name]) for name in sorted(filters)))
+        return self._masks[filters]
+
+    def value(self, metric):
+        # Only values are cached; a metric that raised is computed, and raises, again for the next report using it
+        if metric.key not in self._values:
+            self._values[metric.key] = metric.compute(self)
+        return self._values[metric.key]
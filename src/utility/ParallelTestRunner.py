@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import shutil
+import logging
+import unittest
+import traceback
+import importlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.utility.TempStorage import DEFAULT_TEMP_STORAGE_DIR
+from src.utility.Instrumentation import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class RecordingResult(unittest.TestResult):
+    # Keeps each outcome as plain data so it can be sent back from a worker process
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self._started = {}
+
+    def startTest(self, test):
+        instrumentation.start_test(test)
+        super().startTest(test)
+        self._started[test.id()] = time.perf_counter()
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        instrumentation.stop_test()
+
+    def _record(self, test, outcome, detail=""):
+        started = self._started.pop(test.id(), None)
+        name = getattr(test, "_testMethodName", None)
+        if name is None:
+            # setUpClass/tearDownClass failures arrive on an _ErrorHolder named e.g. "setUpClass (module.Class)"
+            name = str(test).split(" ")[0] + "_failed"
+        self.records.append({"name": name, "doc": test.shortDescription(), "outcome": outcome, "detail": detail,
+                             "time": time.perf_counter() - started if started is not None else 0.0})
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "success")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "failure", self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skip", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "expected_failure", self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "unexpected_success")
+
+
+def run_test_class(module_name, class_name, tests_dir, temp_storage_root):
+    # Worker entry point: runs one class with its own tempStorage and returns its records
+    temp_storage = tempfile.mkdtemp(prefix=f"{class_name}_", dir=temp_storage_root)
+    os.environ["TEMP_STORAGE_DIR"] = temp_storage
+    if tests_dir not in sys.path:
+        sys.path.insert(0, tests_dir)
+    started = time.perf_counter()
+    instrumentation.scope = class_name
+    try:
+        test_class = getattr(importlib.import_module(module_name), class_name)
+        result = RecordingResult()
+        unittest.TestLoader().loadTestsFromTestCase(test_class).run(result)
+        records = result.records
+    except Exception:
+        records = [{"name": "import_failed", "doc": None, "outcome": "error", "detail": traceback.format_exc(),
+                    "time": 0.0}]
+    finally:
+        shutil.rmtree(temp_storage, ignore_errors=True)
+    return {"module": module_name, "class": class_name, "records": records,
+            "time": time.perf_counter() - started, "timings": instrumentation.take_records()}
+
+
+class ReplayedError(Exception):
+    pass
+
+
+def _replay_method(record):
+    outcome, detail = record["outcome"], record["detail"]
+
+    def replay(self):
+        if outcome in ("failure", "expected_failure"):
+            raise self.failureException(detail)
+        if outcome == "error":
+            raise ReplayedError(detail)
+        if outcome == "skip":
+            self.skipTest(detail)
+
+    replay.__doc__ = record["doc"]
+    if outcome in ("expected_failure", "unexpected_success"):
+        replay = unittest.expectedFailure(replay)
+    return replay
+
+
+def replay_suite(class_results):
+    # Rebuilds each worker's outcomes as test cases with the original module, class and test names, so that one
+    # HTMLTestRunner run renders them all into a single report
+    suite = unittest.TestSuite()
+    for class_result in class_results:
+        methods = {record["name"]: _replay_method(record) for record in class_result["records"]}
+        replay_class = type(class_result["class"], (unittest.TestCase,), methods)
+        replay_class.__module__ = class_result["module"]
+        for record in class_result["records"]:
+            test = replay_class(record["name"])
+            # Reported as the test's duration in its worker rather than the replay's
+            test.recorded_time = record["time"]
+            suite.addTest(test)
+    return suite
+
+
+def run_in_parallel(test_classes, tests_dir, max_workers=None):
+    temp_storage_root = os.path.normpath(os.path.join(DEFAULT_TEMP_STORAGE_DIR, 'workers'))
+    os.makedirs(temp_storage_root, exist_ok=True)
+    started = time.perf_counter()
+    class_results = {}
+    with ProcessPoolExecutor(max_workers=max_workers or len(test_classes)) as executor:
+        futures = [executor.submit(run_test_class, module_name, class_name, tests_dir, temp_storage_root)
+                   for module_name, class_name in test_classes]
+        for future in as_completed(futures):
+            class_result = future.result()
+            class_results[(class_result["module"], class_result["class"])] = class_result
+            logger.info(f"{class_result['class']} finished in {class_result['time']:.1f}s")
+    logger.info(f"{len(test_classes)} test classes finished in {time.perf_counter() - started:.1f}s")
+    return [class_results[test_class] for test_class in test_classes]
@@ -0,0 +1,117 @@
+import io
+import os
+import glob
+import atexit
+import pstats
+import cProfile
+import logging
+import tempfile
+import unittest
+import functools
+import tracemalloc
+from contextlib import contextmanager
+
+import environ
+
+env = environ.Env()
+
+# Runs setUpClass and every test method under cProfile and tracemalloc; several times slower, so off by default
+PROFILE_TESTS = env.bool("PROFILE_TESTS", default=False)
+# .prof files and allocation summaries, one per test and replaced by its next profiled run, and the hot function table
+PROFILE_DIR = env("PROFILE_DIR", default=os.path.join(".", "test_reports", "profiles"))
+# Lines in each allocation summary and in each ordering of the hot function table
+PROFILE_TOP = env.int("PROFILE_TOP", default=30)
+HOT_FUNCTIONS_FILE = "hot_functions.txt"
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    def __init__(self, directory=PROFILE_DIR, top=PROFILE_TOP):
+        self.directory = directory
+        self.top = top
+        self.written = []  # .prof files written since the hot function table was
+
+    @contextmanager
+    def profile(self, name):
+        # Allocations are traced from here unless something traces already, e.g. INSTRUMENT_MEMORY
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            peak = tracemalloc.get_traced_memory()[1]
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self._write(name, profile, before, after, peak)
+
+    def _write(self, name, profile, before, after, peak):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{name}.prof")
+        profile.dump_stats(path)
+        ignored = (tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+        allocations = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+        lines = [f"{name}: peak traced memory {peak / 1e6:.1f} MB",
+                 f"Top {self.top} lines by memory allocated and still held at the end:"]
+        lines.extend(str(statistic) for statistic in allocations[:self.top])
+        with open(os.path.join(self.directory, f"{name}.allocations.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self.written.append(path)
+        logger.info(f"Profile of {name} written to {path}")
+
+    def write_hot_functions(self):
+        # The latest profile of every test combined, by time spent in each function itself and including its calls
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.prof")))
+        self.written = []
+        if not paths:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(*paths, stream=stream).strip_dirs()
+        stream.write(f"{len(paths)} profiles in {os.path.abspath(self.directory)}\n")
+        stats.sort_stats("tottime").print_stats(self.top)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        path = os.path.join(self.directory, HOT_FUNCTIONS_FILE)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.txt')
+        with os.fdopen(fd, 'w', encoding="utf-8") as f:
+            f.write(stream.getvalue())
+        os.replace(temp_path, path)
+        logger.info(f"Hot function table written to {path}")
+        return path
+
+    def _write_hot_functions_at_exit(self):
+        # Per-module unittest.main() runs end in sys.exit, so the table is written on the way out
+        if self.written:
+            self.write_hot_functions()
+
+    def profiled(self, test_class):
+        # Class decorator; leaves the class untouched unless PROFILE_TESTS is set
+        if not PROFILE_TESTS:
+            return test_class
+        if "setUpClass" in test_class.__dict__:
+            set_up_class = test_class.__dict__["setUpClass"].__func__
+            test_class.setUpClass = classmethod(self._wrap(f"{test_class.__name__}.setUpClass", set_up_class))
+        for name in unittest.TestLoader().getTestCaseNames(test_class):
+            setattr(test_class, name, self._wrap(f"{test_class.__name__}.{name}", getattr(test_class, name)))
+        return test_class
+
+    def _wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.profile(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+profiler = Profiler()
+profiled = profiler.profiled
+if PROFILE_TESTS:
+    atexit.register(profiler._write_hot_functions_at_exit)
@@ -0,0 +1,70 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+import environ
+
+env = environ.Env()
+
+# Validate only the rows added or changed since the last run and carry the earlier results forward for the rest
+INCREMENTAL_RECONCILIATION = env.bool("INCREMENTAL_RECONCILIATION", default=False)
+# Per-row fingerprints and results of the last run, one JSON file per test class
+RECONCILIATION_STATE_DIR = env("RECONCILIATION_STATE_DIR", default=os.path.join(os.path.dirname(__file__), '..',
+                                                                                 'tempStorage', 'state'))
+# Bumped when a validation changes, so results from older code are not carried forward
+STATE_VERSION = 4
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ReconciliationState:
+    def __init__(self, name, config=None, state_dir=RECONCILIATION_STATE_DIR):
+        # config holds the settings the results depend on, as JSON values; the last run's results are only carried
+        # forward if it ran with the same
+        self.path = os.path.join(os.path.normpath(state_dir), f"{name}.json")
+        self.config = config or {}
+        self.previous_meta, self.previous = self._load()
+        self.meta = {}
+        self.rows = {}  # key -> {"fingerprint": ..., "result": ...} of this run
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        if state.get("version") != STATE_VERSION:
+            return {}, {}
+        if state.get("config", {}) != self.config:
+            logger.info(f"Settings changed since {self.path} was saved, validating every row again")
+            return {}, {}
+        return state["meta"], state["rows"]
+
+    def carried(self, key, row_fingerprint):
+        # The last run's result for key if the row is unchanged, else None
+        entry = self.previous.get(key)
+        if entry is None or entry["fingerprint"] != row_fingerprint:
+            return None
+        return entry["result"]
+
+    def record(self, key, row_fingerprint, result):
+        self.rows[key] = {"fingerprint": row_fingerprint, "result": result}
+
+    def save(self):
+        # Only this run's rows are kept, so removed rows drop out of the state
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"version": STATE_VERSION, "config": self.config, "meta": self.meta, "rows": self.rows}, f)
+        os.replace(temp_path, self.path)
+        logger.info(f"Reconciliation state of {len(self.rows)} rows saved to {self.path}")
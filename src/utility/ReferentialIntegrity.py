@@ -0,0 +1,68 @@
+import pandas as pd
+
+# Keys quoted in an integrity message
+KEY_SAMPLE_SIZE = 10
+
+
+class KeyIndex:
+    # The distinct keys of one dataset column, hashed once and shared by every relation that uses it
+    def __init__(self, keys):
+        self.keys = keys
+
+    @classmethod
+    def from_values(cls, values):
+        return cls(pd.Index(pd.unique(values)))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        # Only the distinct keys seen so far are held, in first-seen order, never a whole column
+        keys = {}
+        for values in chunks:
+            keys.update(dict.fromkeys(pd.unique(values)))
+        return cls(pd.Index(list(keys), dtype=object))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def missing_from(self, other):
+        return self.keys.difference(other.keys, sort=False)
+
+
+class IntegrityResult:
+    def __init__(self, child, parent, key_name, orphans, unreferenced):
+        self.child = child
+        self.parent = parent
+        self.key_name = key_name
+        self.orphans = orphans  # child keys with no parent
+        self.unreferenced = unreferenced  # parent keys no child refers to
+
+    @staticmethod
+    def _describe(keys, key_name, source, target):
+        sample = ", ".join(str(key) for key in keys[:KEY_SAMPLE_SIZE])
+        more = ", ..." if len(keys) > KEY_SAMPLE_SIZE else ""
+        return f"{len(keys)} {key_name}s in {source} are missing from {target}: {sample}{more}"
+
+    def describe_orphans(self):
+        return self._describe(self.orphans, self.key_name, self.child, self.parent)
+
+    def describe_unreferenced(self):
+        return self._describe(self.unreferenced, self.key_name, self.parent, self.child)
+
+
+class ReferentialIntegrity:
+    def __init__(self, key_name):
+        self.key_name = key_name
+        self.indexes = {}  # dataset -> KeyIndex
+
+    def add_dataset(self, dataset, values):
+        self.indexes[dataset] = KeyIndex.from_values(values)
+
+    def add_dataset_chunks(self, dataset, chunks):
+        self.indexes[dataset] = KeyIndex.from_chunks(chunks)
+
+    def check(self, child, parent):
+        # Both directions in one pass over the two indexes: keys of child missing from parent, and the reverse
+        child_index = self.indexes[child]
+        parent_index = self.indexes[parent]
+        return IntegrityResult(child, parent, self.key_name, child_index.missing_from(parent_index),
+                               parent_index.missing_from(child_index))
@@ -0,0 +1,119 @@
+import math
+import itertools
+
+from src.utility.ReconciliationState import fingerprint
+
+# Numbers are bucketed by this width, or twice the tolerance if that is wider. Values are rounded to 2 dp, so they
+# sit at bucket centres and a lookup only probes a neighbouring bucket for a value within tolerance of an edge
+BUCKET_WIDTH = 0.01
+# Rounding slack, in bucket widths, when deciding whether a value is within tolerance of an edge
+EDGE_SLACK = 1e-6
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class ReconciliationResult:
+    def __init__(self, matched, missing, extra, checked=None):
+        self.matched = matched  # (expected_row, actual_row) pairs
+        self.missing = missing  # expected rows with no actual row
+        self.extra = extra  # actual rows no expected row matched
+        self.checked = checked  # expected rows reconciled in this run, the others were carried forward
+
+
+class RowReconciler:
+    def __init__(self, actual_rows, compare_rows, tolerance=1e-6):
+        self.actual_rows = actual_rows
+        self.compare_rows = compare_rows
+        self.tolerance = tolerance
+        self.bucket_width = max(BUCKET_WIDTH, 2 * tolerance)
+        self._by_bucket = None  # bucket key -> actual row indexes
+
+    def _build_index(self):
+        # Built on the first lookup, so an incremental run with nothing to look up never hashes the actual rows
+        self._by_bucket = {}
+        for index, row in enumerate(self.actual_rows):
+            self._by_bucket.setdefault(self.bucket_key(row), []).append(index)
+
+    def _bucket_options(self, value):
+        # A number within tolerance of value lies in value's own bucket, or in a neighbour when value is within
+        # tolerance of the edge to it; the neighbours come after the own bucket
+        number = _as_float(value)
+        if number is None:
+            return (value,)
+        if not math.isfinite(number):
+            return (repr(number),)
+        scaled = number / self.bucket_width
+        bucket = round(scaled)
+        offset = scaled - bucket
+        reach = self.tolerance / self.bucket_width + EDGE_SLACK
+        options = [bucket]
+        if offset - reach <= -0.5:
+            options.append(bucket - 1)
+        if offset + reach >= 0.5:
+            options.append(bucket + 1)
+        return options
+
+    def bucket_key(self, row):
+        return tuple(self._bucket_options(value)[0] for value in row)
+
+    def find(self, expected_row):
+        if self._by_bucket is None:
+            self._build_index()
+        # The row's own buckets first, then the combinations with neighbouring ones, only for numbers near an edge
+        for key in itertools.product(*(self._bucket_options(value) for value in expected_row)):
+            for index in self._by_bucket.get(key, []):
+                if self.compare_rows(expected_row, self.actual_rows[index], self.tolerance):
+                    return index
+        return None
+
+    def reconcile(self, expected_rows):
+        matched = []
+        missing = []
+        matched_indexes = set()
+
+        for expected_row in expected_rows:
+            index = self.find(expected_row)
+            if index is None:
+                missing.append(expected_row)
+            else:
+                matched.append((expected_row, self.actual_rows[index]))
+                matched_indexes.add(index)
+
+        extra = [row for index, row in enumerate(self.actual_rows) if index not in matched_indexes]
+        return ReconciliationResult(matched, missing, extra)
+
+    def reconcile_incremental(self, expected_rows, state):
+        # An expected row matched last time keeps its match while that actual row is still present, and one missing
+        # last time stays missing while the actual rows are unchanged; only the other rows are looked up
+        first_index = {}
+        for index, row in enumerate(self.actual_rows):
+            first_index.setdefault(fingerprint(row), index)
+        actual_rows_fingerprint = fingerprint("".join(sorted(first_index)))
+        actual_rows_unchanged = state.previous_meta.get("actual_rows") == actual_rows_fingerprint
+        state.meta["actual_rows"] = actual_rows_fingerprint
+
+        indexes = []
+        checked = 0
+        for expected_row in expected_rows:
+            key = fingerprint(expected_row)
+            previous = state.carried(key, key)
+            if previous is not None and previous["actual"] in first_index:
+                index = first_index[previous["actual"]]
+            elif previous is not None and previous["actual"] is None and actual_rows_unchanged:
+                index = None
+            else:
+                index = self.find(expected_row)
+                checked += 1
+            state.record(key, key, {"actual": None if index is None else fingerprint(self.actual_rows[index])})
+            indexes.append(index)
+
+        matched = [(row, self.actual_rows[index]) for row, index in zip(expected_rows, indexes) if index is not None]
+        missing = [row for row, index in zip(expected_rows, indexes) if index is None]
+        matched_indexes = set(indexes)
+        extra = [row for index, row in enumerate(self.actual_rows) if index not in matched_indexes]
+        return ReconciliationResult(matched, missing, extra, checked)
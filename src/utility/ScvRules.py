@@ -0,0 +1,42 @@
+from src.utility.FrameRules import RuleRegistry, ValuePresent, NonEmpty
+
+scv_rules = RuleRegistry()
+
+# These three columns should have some data
+scv_rules.register_rules("Contactdetails", [
+    NonEmpty('Address Line 1', "Address Line 1 is empty"),
+    NonEmpty('Address Line 2', "Address Line 2 is empty"),
+    NonEmpty('Post Code', "Postcode is empty"),
+])
+
+scv_rules.register_rules("Customerdetails", [
+    ValuePresent('Customer Surname Or Company Name', "Flagstone Investment Management Limited",
+                 "The company name 'Flagstone Investment Management Limited' was not found."),
+    ValuePresent('Company Number', 8528880.0, "The company number '08528880' was not found."),
+])
+
+scv_rules.register_rules("Detailsofaccount", [
+    ValuePresent('Account Title', "Flagstone Group LTD Client Account", "The Account title was not found."),
+    ValuePresent('Account Number', "SILFIM01YSHAHEEN", "The Account Number was not found."),
+    ValuePresent('Product Name', "Fixed Term Savings", "The Product Number was not found."),
+    ValuePresent('Account Holder Indicator', 1, "The account Holder indicator was not found."),
+    ValuePresent('Account Status Code', "B", "The account status code was not found"),
+    ValuePresent('Exclusion Type', "BEN", "The exclusion type was not found."),
+    ValuePresent('Recent Transactions', "Yes", "The recent transactions was not found"),
+    ValuePresent('Account Branch Jurisdiction', "GBR", "The account branch jurisdiction was not found."),
+    ValuePresent('BRRD Marking', "Yes", "The BRRD marking was not found."),
+    ValuePresent('Structured Deposit Accounts', "No", "The structure deposit accounts was not found"),
+    ValuePresent('Account Balance in Sterling', 100000.00, "The account balance in sterling was not found"),
+    ValuePresent('Authorised Negative Balances', 0, "The autorise negative balance was not found"),
+    ValuePresent('Currency of Account', "GBP", "the currency of account was not found"),
+    ValuePresent('Account Balance in Original Currency', 100000.00,
+                 "The account balance in original currency was not found"),
+    ValuePresent('Exchange Rate', 1.000000000, "The exchange rate was not found"),
+    ValuePresent('Original Account Balance Before Interest', 100000.00,
+                 "The original account balance before interest"),
+])
+
+scv_rules.register_rules("Aggregatebalancedetails", [
+    ValuePresent('Aggregate Balance', 13802905.18, "The aggregate balance was not found"),
+    ValuePresent('Compensatable Amount', 13802905.18, "The compensate amount was not found"),
+])
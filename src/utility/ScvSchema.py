@@ -0,0 +1,77 @@
+import environ
+import pandas as pd
+
+env = environ.Env()
+
+SCV_DELIMITER = "|"
+# Rows per chunk when SCV files are checked as a stream instead of loaded whole; 0 loads them whole
+SCV_CHUNK_ROWS = env.int("SCV_CHUNK_ROWS", default=0)
+
+# Columns read from each SCV file, with explicit dtypes so read_csv skips type inference; code columns with a handful
+# of distinct values are categoricals. Anything not listed is never parsed.
+SCV_DTYPES = {
+    "Contactdetails": {
+        'SCVID': str,
+        'Address Line 1': str,
+        'Address Line 2': str,
+        'Post Code': str,
+    },
+    "Customerdetails": {
+        'SCVID': str,
+        'Customer Surname Or Company Name': str,
+        'Company Number': "float64",
+    },
+    "Detailsofaccount": {
+        'SCVID': str,
+        'Account Title': str,
+        'Account Number': str,
+        'Product Name': "category",
+        'Account Holder Indicator': "float64",
+        'Account Status Code': "category",
+        'Exclusion Type': "category",
+        'Recent Transactions': "category",
+        'Account Branch Jurisdiction': "category",
+        'BRRD Marking': "category",
+        'Structured Deposit Accounts': "category",
+        'Account Balance in Sterling': "float64",
+        'Authorised Negative Balances': "float64",
+        'Currency of Account': "category",
+        'Account Balance in Original Currency': "float64",
+        'Exchange Rate': "float64",
+        'Original Account Balance Before Interest': "float64",
+    },
+    "Aggregatebalancedetails": {
+        'SCVID': str,
+        'Aggregate Balance': "float64",
+        'Compensatable Amount': "float64",
+    },
+}
+
+
+def _read_options(dataset, columns):
+    dtypes = SCV_DTYPES[dataset]
+    if columns is not None:
+        dtypes = {column: dtypes[column] for column in columns}
+    # A callable usecols tolerates a missing column; RuleCheck then fails only the rules on that column
+    return dict(delimiter=SCV_DELIMITER, usecols=lambda column: column in dtypes, dtype=dtypes)
+
+
+def read_scv(file_path, dataset, columns=None):
+    # The whole file, trailer row included
+    return pd.read_csv(file_path, **_read_options(dataset, columns))
+
+
+def iter_scv(file_path, dataset, chunk_rows, columns=None):
+    # Yields (chunk, 1-based number of its first row) with the trailer row dropped. Each chunk is held back until the
+    # next one is read, so the file's last row is known when the final chunk is yielded.
+    reader = pd.read_csv(file_path, chunksize=chunk_rows, **_read_options(dataset, columns))
+    first_row = 1
+    pending = None
+    with reader:
+        for chunk in reader:
+            if pending is not None:
+                yield pending, first_row
+                first_row += len(pending)
+            pending = chunk
+    if pending is not None and len(pending) > 1:
+        yield pending.iloc[:-1], first_row
@@ -0,0 +1,162 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+import environ
+import numpy as np
+
+from src.utility import ExcelStream
+from src.utility.DownloadCache import DownloadCache
+
+env = environ.Env()
+
+# Parsed sheets are written here as one .npy file per column, keyed by the sha256 of the workbook
+SHEET_SNAPSHOT_DIR = env("SHEET_SNAPSHOT_DIR", default=os.path.join(os.path.dirname(__file__), '..', 'tempStorage',
+                                                                     'snapshots'))
+# Snapshots of this many most recently converted workbooks are kept; 0 turns snapshots off
+SHEET_SNAPSHOT_KEEP = env.int("SHEET_SNAPSHOT_KEEP", default=20)
+
+logger = logging.getLogger(__name__)
+
+_digests = {}  # (path, mtime, size) -> sha256, so a workbook is hashed once per process
+_digests_lock = threading.Lock()
+
+
+def workbook_digest(file_path):
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        if key in _digests:
+            return _digests[key]
+    digest = DownloadCache.file_digest(file_path)
+    with _digests_lock:
+        _digests[key] = digest
+    return digest
+
+
+def _snapshot_path(digest, sheet_name, min_row, columns):
+    projection = hashlib.sha1(repr((sheet_name, min_row, columns)).encode()).hexdigest()[:16]
+    return os.path.join(os.path.normpath(SHEET_SNAPSHOT_DIR), digest, projection)
+
+
+# Kind of each cell of a numeric column, kept beside its float64 values so every cell reads back as it was parsed
+FLOAT, INT, EMPTY = 0, 1, 2
+MAX_EXACT_INT = 2 ** 53  # larger ints do not survive a float64
+
+
+class NumericColumn:
+    # A memory-mapped float64 column with NaN for empty cells, plus each cell's kind; slicing and indexing give back
+    # the Python ints, floats and Nones openpyxl returned
+    def __init__(self, values, kinds):
+        self.values = values
+        self.kinds = kinds
+        self.dtype = values.dtype
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.kinds.nbytes
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            values = self.values[index].tolist()
+            kinds = self.kinds[index]
+            for position in np.flatnonzero(kinds == INT):
+                values[position] = int(values[position])
+            for position in np.flatnonzero(kinds == EMPTY):
+                values[position] = None
+            return values
+        kind = self.kinds[index]
+        if kind == EMPTY:
+            return None
+        value = self.values[index].item()
+        return int(value) if kind == INT else value
+
+
+def _column_arrays(values):
+    # (values, kinds): floats alone are stored as float64; ints, floats and empty cells together as float64 with NaN
+    # for empty cells plus an int8 kind per cell, so both memory-map on load. Text, dates, booleans and ints too large
+    # for a float64 fall back to a pickled object array with kinds None
+    kinds = {type(value) for value in values}
+    if kinds == {float}:
+        return np.array(values, dtype=np.float64), None
+    if kinds and kinds <= {int, float, type(None)} and kinds != {type(None)} and all(
+            abs(value) <= MAX_EXACT_INT for value in values if type(value) is int):
+        kind_of = {float: FLOAT, int: INT, type(None): EMPTY}
+        return (np.array([np.nan if value is None else value for value in values], dtype=np.float64),
+                np.array([kind_of[type(value)] for value in values], dtype=np.int8))
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array, None
+
+
+def _write_snapshot(snapshot_path, sheet):
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    temp_path = tempfile.mkdtemp(dir=os.path.dirname(snapshot_path))
+    meta = {"min_row": sheet.min_row, "max_row": sheet.max_row, "max_column": sheet.max_column, "columns": [],
+            "numeric": []}
+    for column, values in sheet.columns.items():
+        array, kinds = _column_arrays(values)
+        np.save(os.path.join(temp_path, f"{column}.npy"), array, allow_pickle=array.dtype == object)
+        if kinds is not None:
+            np.save(os.path.join(temp_path, f"{column}.kinds.npy"), kinds)
+            meta["numeric"].append(column)
+        meta["columns"].append(column)
+    with open(os.path.join(temp_path, "meta.json"), 'w') as f:
+        json.dump(meta, f)
+    try:
+        os.replace(temp_path, snapshot_path)
+    except OSError:
+        # Another process wrote the same snapshot first
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+
+def _read_snapshot(snapshot_path):
+    with open(os.path.join(snapshot_path, "meta.json")) as f:
+        meta = json.load(f)
+    numeric = set(meta.get("numeric", []))
+    columns = {}
+    for column in meta["columns"]:
+        column_path = os.path.join(snapshot_path, f"{column}.npy")
+        if column in numeric:
+            columns[column] = NumericColumn(np.load(column_path, mmap_mode='r'),
+                                            np.load(os.path.join(snapshot_path, f"{column}.kinds.npy"), mmap_mode='r'))
+            continue
+        try:
+            columns[column] = np.load(column_path, mmap_mode='r')
+        except ValueError:
+            # Object arrays cannot be memory-mapped
+            columns[column] = np.load(column_path, allow_pickle=True)
+    return ExcelStream.SheetData(columns, meta["min_row"], meta["max_row"], meta["max_column"])
+
+
+def _prune():
+    snapshot_dir = os.path.normpath(SHEET_SNAPSHOT_DIR)
+    workbooks = sorted((entry for entry in os.scandir(snapshot_dir) if entry.is_dir()),
+                       key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in workbooks[SHEET_SNAPSHOT_KEEP:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def load_sheet(file_path, sheet_name=None, min_row=1, columns=None):
+    # Same result as ExcelStream.load_sheet, parsed from the workbook only the first time this file content is seen
+    if SHEET_SNAPSHOT_KEEP <= 0:
+        return ExcelStream.load_sheet(file_path, sheet_name=sheet_name, min_row=min_row, columns=columns)
+
+    columns = tuple(columns) if columns is not None else None
+    snapshot_path = _snapshot_path(workbook_digest(file_path), sheet_name, min_row, columns)
+    if os.path.exists(snapshot_path):
+        logger.info(f"Loading snapshot of {file_path}")
+        os.utime(os.path.dirname(snapshot_path))
+        return _read_snapshot(snapshot_path)
+
+    sheet = ExcelStream.load_sheet(file_path, sheet_name=sheet_name, min_row=min_row, columns=columns)
+    _write_snapshot(snapshot_path, sheet)
+    _prune()
+    return _read_snapshot(snapshot_path)
@@ -0,0 +1,12 @@
+import os
+
+DEFAULT_TEMP_STORAGE_DIR = os.path.join(os.path.dirname(__file__), '..', 'tempStorage')
+
+
+def temp_storage_path(name):
+    # Test classes wipe their download folders in tearDownClass, so the parallel runner gives each worker process
+    # its own TEMP_STORAGE_DIR; read on every call because workers set it after importing the test modules
+    root = os.environ.get("TEMP_STORAGE_DIR") or DEFAULT_TEMP_STORAGE_DIR
+    path = os.path.normpath(os.path.join(root, name))
+    os.makedirs(path, exist_ok=True)
+    return path
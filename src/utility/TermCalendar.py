@@ -0,0 +1,47 @@
+import re
+import calendar
+from datetime import datetime, date
+
+import environ
+import numpy as np
+
+env = environ.Env()
+
+# "fixed": 365 days a year and 30 days a month, the convention the output is built with (12M is 365 days and 01M
+# is 30); "calendar": a deal runs from its start date to the same day TERM months later, so 12M is 366 days over a
+# 29 February and 01M is 28 to 31 days
+FTD_TERM_DAY_COUNT = env("FTD_TERM_DAY_COUNT", default="fixed")
+# Divisor of the daily interest: a number of days, or "actual" for 366 on days in a leap year and 365 otherwise
+INTEREST_DAY_BASIS = env("INTEREST_DAY_BASIS", default="365")
+
+TERM_PATTERN = re.compile(r"(\d+)M")
+
+
+def term_months(reference_number):
+    # The term code of a reference number such as "FS00012-12M" or "FS00013-03M", in months
+    if not isinstance(reference_number, str):
+        return None
+    terms = TERM_PATTERN.findall(reference_number)
+    months = int(terms[-1]) if terms else 0
+    return months or None
+
+
+def add_months(start, months):
+    month = start.month - 1 + months
+    year = start.year + month // 12
+    month = month % 12 + 1
+    return start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def term_days(start, months, day_count=FTD_TERM_DAY_COUNT):
+    # Days in the schedule of a deal of months months starting on start
+    if day_count == "calendar" and isinstance(start, (datetime, date)):
+        return (add_months(start, months) - start).days
+    return 365 * months // 12 if months % 12 == 0 else 30 * months
+
+
+def day_basis(dates, basis=INTEREST_DAY_BASIS):
+    if basis != "actual":
+        return float(basis)
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    return np.where((years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0)), 366.0, 365.0)
@@ -0,0 +1,89 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import environ
+
+from src.utility import ExcelStream, SheetSnapshot
+
+env = environ.Env()
+
+# Memory budget for parsed workbooks kept alive across test classes
+WORKBOOK_CACHE_BUDGET_MB = env.int("WORKBOOK_CACHE_BUDGET_MB", default=2048)
+
+logger = logging.getLogger(__name__)
+
+
+class WorkbookCache:
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        self._used_bytes = 0
+        self._loading = {}  # key -> Future of a load in progress
+        self._lock = threading.Lock()  # guards the dicts only; loaders run outside it
+
+    @staticmethod
+    def _key(file_path, variant):
+        # Keyed by content, so the copy another test class downloaded into its own folder is a hit
+        return SheetSnapshot.workbook_digest(file_path), variant
+
+    def get(self, file_path, loader, size_of, variant="workbook"):
+        key = self._key(file_path, variant)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                logger.info(f"Workbook cache hit: {file_path}")
+                return self._entries[key][0]
+            loading = self._loading.get(key)
+            loads = loading is None
+            if loads:
+                loading = self._loading[key] = Future()
+
+        if not loads:
+            # The same content is being parsed by another thread; different workbooks parse concurrently
+            logger.info(f"Workbook cache waiting for the load in progress: {file_path}")
+            return loading.result()
+
+        try:
+            value = loader(file_path)
+            size = size_of(value)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._entries[key] = (value, size)
+            self._used_bytes += size
+            self._evict(keep=key)
+        loading.set_result(value)
+        return value
+
+    def load_sheet(self, file_path, sheet_name=None, min_row=1, columns=None):
+        columns = tuple(columns) if columns is not None else None
+
+        def _load(path):
+            return SheetSnapshot.load_sheet(path, sheet_name=sheet_name, min_row=min_row, columns=columns)
+
+        return self.get(file_path, _load, ExcelStream.SheetData.memory_usage,
+                        variant=("sheet", sheet_name, min_row, columns))
+
+    def _evict(self, keep):
+        for old_key in list(self._entries):
+            if self._used_bytes <= self.budget_bytes:
+                break
+            if old_key == keep:
+                continue
+            self._used_bytes -= self._entries.pop(old_key)[1]
+            logger.info(f"Workbook cache evicted: {old_key[1]} of {old_key[0]}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._used_bytes = 0
+
+
+# Shared by every test class running in this process
+workbook_cache = WorkbookCache(WORKBOOK_CACHE_BUDGET_MB * 1024 * 1024)